@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from mock_x import add_mock_arguments, settings_from_args, start_mock_server
+
+def start_server_thread(settings):
+    """
+    Runs the mock server on its own event loop in a daemon thread.
+
+    Selenium calls block the calling thread, so the server cannot share the
+    benchmark's loop. Returns (base_url, mock).
+    """
+    ready = threading.Event()
+    state = {}
+
+    def _serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _, state["base_url"], state["mock"] = loop.run_until_complete(start_mock_server(settings))
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=_serve, daemon=True).start()
+    ready.wait()
+    return state["base_url"], state["mock"]
+
+def configure_for_mock(base_url, delay, rate_limit_delay):
+    """Points config at the mock server and shortens every sleep timer."""
+    # Must run before config (and anything importing it) is first imported.
+    os.environ["X_BASE_URL"] = base_url
+    os.environ["X_MEDIA_BASE_URL"] = base_url
+    from config import config
+
+    config.X_USER = config.X_USER or "mock"
+    config.X_PASS = config.X_PASS or "mock"
+    for name in ("LOGIN_COOKIE_APPLY_DELAY", "LOGIN_FORM_TRANSITION_DELAY", "SCROLL_INITIAL_LOAD_DELAY",
+                 "SCROLL_NEW_CONTENT_DELAY", "SEARCH_PAGE_LOAD_DELAY"):
+        setattr(config, name, delay)
+    config.RATE_LIMIT_DELAY = rate_limit_delay
+    return config
+
+async def bench_download(base_url, media_count, output_dir):
+    """Downloads media_count synthetic images through the normalizer; returns (MB, seconds)."""
+    from downloader import download_media
+    from media_normalizer import prepare_media_downloads
+
+    tweets = [{"media_urls": [f"{base_url}/media/B{i:08d}?format=jpg&name=small"]} for i in range(media_count)]
+    start = time.perf_counter()
+    media_urls = await prepare_media_downloads(tweets)
+    saved = await download_media(media_urls, output_dir)
+    elapsed = time.perf_counter() - start
+    total_bytes = sum(os.path.getsize(path) for _, path in saved)
+    return total_bytes / 1_000_000, elapsed
+
+async def bench_browser(base_url, args, work_dir):
+    """Runs the timeline scraper, a user search and the curator against the mock; prints rates."""
+    import curator
+    from scraper import XScraper
+
+    curator.CURATED_ARTISTS_FILE = os.path.join(work_dir, "curated_artists.csv")
+    scraper = None
+    try:
+        scraper = XScraper(headless=True, cookie_file=os.path.join(work_dir, "cookies.json"))
+        if not scraper.login():
+            print("Login against the mock server failed; skipping browser benchmarks.")
+            return
+
+        start = time.perf_counter()
+        tweets = scraper.scroll_and_extract(max_tweets=args.max_tweets, max_minutes=args.max_minutes)
+        elapsed = time.perf_counter() - start
+        print(f"timeline: {len(tweets)} tweets in {elapsed:.1f}s = {len(tweets) / elapsed * 60:.0f} tweets/min")
+
+        start = time.perf_counter()
+        tweets = scraper.scrape_from_search(f"{base_url}/search?q=from%3Abench_artist&f=live", limit=args.max_tweets)
+        elapsed = time.perf_counter() - start
+        print(f"search: {len(tweets)} tweets in {elapsed:.1f}s = {len(tweets) / elapsed * 60:.0f} tweets/min")
+
+        start = time.perf_counter()
+        rows = await curator._curate_single_artist(scraper.driver, f"{base_url}/bench_artist")
+        elapsed = time.perf_counter() - start
+        print(f"curate: {len(rows)} follower rows in {elapsed:.1f}s = {len(rows) / elapsed * 60:.0f} rows/min")
+    finally:
+        if scraper:
+            scraper.close()
+
+async def main():
+    parser = argparse.ArgumentParser(description="End-to-end throughput benchmark against the local mock X server.")
+    add_mock_arguments(parser)
+    parser.add_argument("--media-count", type=int, default=200,
+                        help="Number of images for the download benchmark.")
+    parser.add_argument("--browser", action="store_true",
+                        help="Also benchmark the Selenium scraper and curator (requires Chrome).")
+    parser.add_argument("--max-tweets", type=int, default=100,
+                        help="Tweets to collect per browser benchmark.")
+    parser.add_argument("--max-minutes", type=float, default=2,
+                        help="Time limit per browser benchmark.")
+    parser.add_argument("--delay", type=float, default=0.5,
+                        help="Value used for every config sleep timer during the benchmark.")
+    parser.add_argument("--rate-limit-delay", type=float, default=2,
+                        help="Value used for config.RATE_LIMIT_DELAY during the benchmark.")
+    args = parser.parse_args()
+
+    base_url, mock = start_server_thread(settings_from_args(args))
+    configure_for_mock(base_url, args.delay, args.rate_limit_delay)
+    print(f"Mock X serving at {base_url}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        megabytes, elapsed = await bench_download(base_url, args.media_count, os.path.join(work_dir, "media"))
+        print(f"download: {megabytes:.1f} MB in {elapsed:.2f}s = {megabytes / elapsed:.1f} MB/s")
+
+        if args.browser:
+            await bench_browser(base_url, args, work_dir)
+
+    print(f"Mock server handled {mock.requests} requests and sent {mock.media_bytes_sent / 1_000_000:.1f} MB of media.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import codec
+from records import TweetRecord, iter_tweets, write_tweets
+
+def _make_tweets(count, artist_count):
+    """Returns count synthetic tweets (as plain dicts) spread over artist_count artists."""
+    tweets = []
+    for i in range(count):
+        artist = i % artist_count
+        tweet_id = str(1800000000000000000 + i)
+        tweets.append({
+            "id": tweet_id, "url": f"https://x.com/artist{artist}/status/{tweet_id}",
+            "author": f"Artist {artist}", "author_handle": f"@artist{artist}",
+            "timestamp": "2025-01-01T00:00:00.000Z", "text": f"New piece #{i} 絵 #art #illustration",
+            "stats": {"reply": i % 7, "repost": i % 50, "like": i % 900, "bookmark": i % 30, "view": i * 3},
+            "media_urls": [f"https://pbs.twimg.com/media/G{i:014d}?format=jpg&name=orig"],
+            "media_local_paths": [f"media/G{i:014d}.jpg"],
+        })
+    return tweets
+
+def _measure_memory(load):
+    """Returns the bytes still allocated by the list load() builds."""
+    tracemalloc.start()
+    tweets = load()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tweets
+    return current
+
+def _best_of(func, runs=3):
+    """Returns the fastest of runs timings of func, in seconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def _stdlib_read(path):
+    tweets = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                tweets.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass
+    return tweets
+
+def _stdlib_write(path, tweets):
+    with open(path, "w", encoding="utf-8") as f:
+        for tweet in tweets:
+            f.write(json.dumps(tweet, ensure_ascii=False) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tweet record memory and JSONL parse/serialize throughput.")
+    parser.add_argument("--tweets", type=int, default=100_000, help="Number of synthetic tweets.")
+    parser.add_argument("--artists", type=int, default=200, help="Number of distinct authors.")
+    args = parser.parse_args()
+
+    print(f"JSON backend: {codec.BACKEND}")
+    with tempfile.TemporaryDirectory() as root_dir:
+        path = os.path.join(root_dir, "tweets.jsonl")
+        _stdlib_write(path, _make_tweets(args.tweets, args.artists))
+        print(f"{args.tweets} tweets, {os.path.getsize(path) / 1_000_000:.1f} MB of JSONL")
+
+        dict_bytes = _measure_memory(lambda: _stdlib_read(path))
+        record_bytes = _measure_memory(lambda: list(iter_tweets(path)))
+        per_100k = 100_000 / args.tweets / 1_000_000
+        print(f"{'memory per 100k tweets':<28} dicts {dict_bytes * per_100k:8.1f} MB   "
+              f"records {record_bytes * per_100k:8.1f} MB")
+
+        out_path = os.path.join(root_dir, "out.jsonl")
+        timings = {"parse": (_best_of(lambda: _stdlib_read(path)), _best_of(lambda: list(iter_tweets(path))))}
+        dicts = _stdlib_read(path)
+        records = list(iter_tweets(path))
+        timings["serialize"] = (_best_of(lambda: _stdlib_write(out_path, dicts)),
+                                _best_of(lambda: write_tweets(out_path, records)))
+        for name, (before, after) in timings.items():
+            print(f"{name + ' (tweets/s)':<28} stdlib {args.tweets / before:10,.0f}   "
+                  f"{codec.BACKEND} {args.tweets / after:10,.0f}   ({before / after:.1f}x)")
+
+        # Records round-trip to the same objects the stdlib path produced.
+        assert [TweetRecord.from_dict(t).to_dict() for t in dicts[:100]] == dicts[:100]
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Modules that only browser-driving or heavy index commands should pay for.
+HEAVY_MODULES = ["undetected_chromedriver", "selenium", "aiohttp", "numpy", "PIL"]
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _make_fixture(root_dir, tweet_count):
+    """Writes a small run directory and artist CSV for the offline commands."""
+    run_dir = os.path.join(root_dir, "artist_20250101_000000")
+    os.makedirs(os.path.join(run_dir, "media"))
+    with open(os.path.join(run_dir, "tweets.jsonl"), "w", encoding="utf-8") as f:
+        for i in range(tweet_count):
+            tweet = {
+                "id": str(1000 + i), "author_handle": "@artist", "timestamp": "2025-01-01T00:00:00.000Z",
+                "text": f"tweet {i} #art", "stats": {"like": i, "view": i * 10}, "media_local_paths": [],
+            }
+            f.write(json.dumps(tweet) + "\n")
+
+    csv_path = os.path.join(root_dir, "artists.csv")
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write("username,handle,url,timestamp\nArtist,@artist,https://x.com/artist,\n")
+    return run_dir, csv_path
+
+def _median_ms(argv, runs, env):
+    """Runs argv runs times and returns the median wall time in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def _heavy_imports(argv, env):
+    """Runs argv under -X importtime and returns which HEAVY_MODULES it imported."""
+    result = subprocess.run([sys.executable, "-X", "importtime", *argv[1:]], cwd=REPO_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imported = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines() if "|" in line}
+    return [name for name in HEAVY_MODULES if name in imported]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup time of the offline subcommands.")
+    parser.add_argument("--runs", type=int, default=10, help="Number of timed runs per command.")
+    parser.add_argument("--tweets", type=int, default=100, help="Number of tweets in the synthetic run.")
+    args = parser.parse_args()
+
+    # Offline commands must not need credentials.
+    env = {k: v for k, v in os.environ.items() if k not in ("X_USER", "X_PASS")}
+
+    baseline_ms = _median_ms([sys.executable, "-c", "pass"], args.runs, env)
+    print(f"{'python -c pass':<32} {baseline_ms:8.1f} ms  (interpreter baseline)")
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        run_dir, csv_path = _make_fixture(root_dir, args.tweets)
+        commands = {
+            "--help": ["--help"],
+            "select": ["select", "--input-dir", run_dir, "--output-dir", os.path.join(root_dir, "selected")],
+            "plan": ["plan", "--input-csv", csv_path, "--output-dir", root_dir],
+            "search": ["search", "art", "--data-root", root_dir,
+                       "--index-file", os.path.join(root_dir, "search_index.sqlite3")],
+        }
+        for name, command_args in commands.items():
+            argv = [sys.executable, "main.py", *command_args]
+            median_ms = _median_ms(argv, args.runs, env)
+            heavy = _heavy_imports(argv, env)
+            loaded = ", ".join(heavy) if heavy else "none"
+            print(f"{'main.py ' + name:<32} {median_ms:8.1f} ms  (heavy imports: {loaded})")
+
+if __name__ == "__main__":
+    main()
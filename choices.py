@@ -0,0 +1,28 @@
+# Sort and filter choices shared by the command-line parser in main.py and the
+# modules that implement them. Kept free of imports so building the parser
+# never loads a command's dependencies.
+
+# Extra select --sort-by choices computed from the stats store, as (stat, metric).
+TREND_SORT_KEYS = {
+    "likes_24h": ("like", "gained"),
+    "views_24h": ("view", "gained"),
+    "likes_growth": ("like", "growth"),
+    "views_growth": ("view", "growth"),
+}
+
+# Maps each --min-* argument to the tweet stat it filters on.
+STAT_FILTERS = {
+    "min_replies": "reply",
+    "min_reposts": "repost",
+    "min_likes": "like",
+    "min_bookmarks": "bookmark",
+    "min_views": "view",
+}
+
+# search --sort-by choices and the ORDER BY expression each one uses.
+SORT_COLUMNS = {
+    "rank": "bm25(tweets_fts)",
+    "likes": "-tweets.likes",
+    "views": "-tweets.views",
+    "recent": "tweets.timestamp DESC",
+}
@@ -0,0 +1,62 @@
+import json
+from typing import Iterable, Iterator
+
+# Pick the fastest JSON library available. orjson and msgspec are optional;
+# the stdlib fallback produces identical output (UTF-8, no ASCII escaping).
+try:
+    import orjson
+
+    BACKEND = "orjson"
+    _loads = orjson.loads
+    _dumps_bytes = orjson.dumps
+    _DECODE_ERRORS = (orjson.JSONDecodeError,)
+except ImportError:
+    try:
+        import msgspec
+
+        BACKEND = "msgspec"
+        _encoder = msgspec.json.Encoder()
+        _loads = msgspec.json.decode
+        _dumps_bytes = _encoder.encode
+        _DECODE_ERRORS = (msgspec.DecodeError,)
+    except ImportError:
+        BACKEND = "json"
+        _loads = json.loads
+        _DECODE_ERRORS = (json.JSONDecodeError, UnicodeDecodeError)
+
+        def _dumps_bytes(obj):
+            return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class DecodeError(ValueError):
+    """Raised when a line is not valid JSON, whichever backend is in use."""
+
+def loads(data):
+    """Decodes a JSON document from str or bytes."""
+    try:
+        return _loads(data)
+    except _DECODE_ERRORS as e:
+        raise DecodeError(str(e)) from e
+
+def dumps_bytes(obj) -> bytes:
+    return _dumps_bytes(obj)
+
+def dumps(obj) -> str:
+    return _dumps_bytes(obj).decode("utf-8")
+
+def iter_jsonl(path: str) -> Iterator[object]:
+    """Yields each decoded line of a JSONL file, skipping (and reporting) invalid ones."""
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield loads(line)
+            except DecodeError:
+                print(f"Skipping invalid line in {path}")
+
+def write_jsonl(path: str, objs: Iterable[object], append: bool = False):
+    """Writes one JSON document per line."""
+    with open(path, "ab" if append else "wb") as f:
+        for obj in objs:
+            f.write(_dumps_bytes(obj))
+            f.write(b"\n")
@@ -2,6 +2,8 @@
 import json
 import os
 
+from records import iter_tweets
+
 def compile_jsonl_results(root_dir, output_file):
     """
     Compiles all tweets.jsonl files from subdirectories into a single JSON file.
@@ -17,12 +19,7 @@ def compile_jsonl_results(root_dir, output_file):
             jsonl_path = os.path.join(dir_path, 'tweets.jsonl')
             if os.path.exists(jsonl_path):
                 print(f"Processing {jsonl_path}...")
-                with open(jsonl_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            all_data.append(json.loads(line))
-                        except json.JSONDecodeError:
-                            print(f"Skipping invalid JSON line in {jsonl_path}")
+                all_data.extend(tweet.to_dict() for tweet in iter_tweets(jsonl_path))
 
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(all_data, f, indent=2, ensure_ascii=False)
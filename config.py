@@ -7,6 +7,10 @@ class Config:
     X_USER = os.getenv("X_USER")
     X_PASS = os.getenv("X_PASS")
 
+    # Overridable so the scraper can be pointed at a local stand-in (see mock_x.py).
+    X_BASE_URL = os.getenv("X_BASE_URL", "https://x.com").rstrip("/")
+    MEDIA_BASE_URL = os.getenv("X_MEDIA_BASE_URL", "https://pbs.twimg.com").rstrip("/")
+
     # Sleep Timers (in seconds)
     LOGIN_COOKIE_APPLY_DELAY = 5
     LOGIN_FORM_TRANSITION_DELAY = 5
@@ -16,7 +20,25 @@ class Config:
     SEARCH_PAGE_LOAD_DELAY = 5
     RATE_LIMIT_DELAY = 300
 
-    if not X_USER or not X_PASS:
-        raise ValueError("X_USER and X_PASS environment variables must be set in the .env file.")
+    # Media size variant to download: "orig", "large", "medium", "small",
+    # or an int byte budget (largest variant that fits is chosen per image).
+    MEDIA_TARGET_SIZE = "orig"
+
+    # Default locations of the persistent indexes built from scraped runs.
+    MEDIA_INDEX_FILE = "data/media_index.jsonl"
+    SEARCH_INDEX_FILE = "data/search_index.sqlite3"
+    STATS_STORE_FILE = "data/stats_store.npz"
+    FOLLOW_GRAPH_FILE = "data/follow_graph.npz"
+
+    # Seconds a job queue lease survives without a heartbeat (see job_queue.py).
+    JOB_LEASE_SECONDS = 600
+    # Most of a shared --max-tweets budget one queued artist may hold at a time,
+    # when --max-artist-tweets does not set a smaller limit.
+    JOB_TWEET_CHUNK = 100
+
+    def validate_credentials(self):
+        """Raises if login credentials are missing. Only browser commands need them."""
+        if not self.X_USER or not self.X_PASS:
+            raise ValueError("X_USER and X_PASS environment variables must be set in the .env file.")
 
 config = Config()
@@ -3,21 +3,25 @@ import os
 import re
 import time
 from datetime import datetime
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from urllib.parse import urlparse
+from config import config
 
 CURATED_ARTISTS_FILE = "data/curated_artists.csv"
 USER_ROW_SELECTOR = '[data-testid$="-follow"]'
+# Profile URLs on x.com or twitter.com (any subdomain, scheme optional) or the configured X_BASE_URL host.
+PROFILE_URL_PATTERN = re.compile(
+    rf"^(?:https?://)?(?:(?:[\w-]+\.)*(?:twitter|x)\.com|{re.escape(urlparse(config.X_BASE_URL).netloc)})/([^/?#]+)"
+)
 
-def get_curated_artists():
+def get_curated_artists(csv_path=None):
     """
     Reads the curated artists from the CSV file and returns a set of user handles.
     """
-    if not os.path.exists(CURATED_ARTISTS_FILE):
+    csv_path = csv_path or CURATED_ARTISTS_FILE
+    if not os.path.exists(csv_path):
         return set()
 
-    with open(CURATED_ARTISTS_FILE, "r", newline="", encoding="utf-8") as f:
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
         reader = csv.reader(f)
         try:
             next(reader, None)  # Skip header
@@ -25,9 +29,62 @@ def get_curated_artists():
         except (StopIteration, IndexError):
             return set()
 
-async def curate_recursively(driver, artist_url, depth, visited_urls=None):
+def read_usernames(csv_path):
+    """
+    Reads artist usernames (without the leading @) from a curated artists CSV.
+
+    Raises:
+        FileNotFoundError: If csv_path does not exist.
+    """
+    usernames = []
+    with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader, None)  # Skip header
+        for row in reader:
+            if row:
+                usernames.append(row[1].lstrip('@'))
+    return usernames
+
+def append_curated_artists(rows, csv_path=None):
+    """
+    Appends (username, handle, url, timestamp) rows whose handle is not in the
+    curated artists CSV yet.
+
+    Returns:
+        The number of rows written.
+    """
+    csv_path = csv_path or CURATED_ARTISTS_FILE
+    existing_handles = get_curated_artists(csv_path)
+    new_rows = []
+    for row in rows:
+        if row[1] and row[1] not in existing_handles:
+            new_rows.append(row)
+            existing_handles.add(row[1])
+    if not new_rows:
+        return 0
+
+    csv_dir = os.path.dirname(csv_path)
+    if csv_dir:
+        os.makedirs(csv_dir, exist_ok=True)
+    file_exists = os.path.exists(csv_path)
+    with open(csv_path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if not file_exists or os.path.getsize(csv_path) == 0:
+            writer.writerow(["username", "handle", "url", "timestamp"])
+        writer.writerows(new_rows)
+    return len(new_rows)
+
+def handle_from_url(url):
+    """Returns the handle (without @) of a profile URL, or None if it is not one."""
+    match = PROFILE_URL_PATTERN.match(url)
+    return match.group(1) if match else None
+
+async def curate_recursively(driver, artist_url, depth, visited_urls=None, graph=None):
     """
     Recursively scrapes the followed list of artists.
+
+    If a FollowGraph is given, each artist's follow edges are recorded in it and
+    saved as soon as the artist has been scanned.
     """
     if visited_urls is None:
         visited_urls = set()
@@ -40,15 +97,65 @@ async def curate_recursively(driver, artist_url, depth, visited_urls=None):
     print(f"Curating artist: {artist_url} at depth {depth}")
     scanned_artists = await _curate_single_artist(driver, artist_url)
 
+    artist_handle = handle_from_url(artist_url)
+    if graph is not None and artist_handle and scanned_artists:
+        graph.set_following(artist_handle, [handle for _, handle, _, _ in scanned_artists])
+        graph.save()
+
     if depth > 0:
         for _, _, next_artist_url, _ in scanned_artists:
-            await curate_recursively(driver, next_artist_url, depth - 1, visited_urls)
+            await curate_recursively(driver, next_artist_url, depth - 1, visited_urls, graph)
+
+def artist_job(artist_url, depth):
+    """Returns the (key, payload) of a curate frontier job, keyed by handle so each artist is crawled once."""
+    return (handle_from_url(artist_url) or artist_url).lower(), {"url": artist_url, "depth": depth}
+
+def enqueue_artist(queue, artist_url, depth):
+    """Adds an artist to a shared curate frontier unless it is already known."""
+    return queue.enqueue(*artist_job(artist_url, depth))
+
+async def curate_from_queue(driver, queue, lease_seconds, graph=None):
+    """
+    Crawls artists leased from a shared frontier queue until it is drained.
+
+    The distributed counterpart of curate_recursively: followed artists are
+    enqueued with one less depth instead of being recursed into, so every box
+    working the queue shares one frontier. Each job's follow edges and scanned
+    artists are reported back as its result (see the jobs command).
+
+    Returns:
+        The number of artists this worker curated.
+    """
+    from job_queue import work_queue
+
+    async def curate_job(lease):
+        artist_url, depth = lease.payload["url"], lease.payload["depth"]
+        print(f"Curating artist: {artist_url} at depth {depth}")
+        scanned_artists = await _curate_single_artist(driver, artist_url)
+
+        artist_handle = handle_from_url(artist_url)
+        following = [handle for _, handle, _, _ in scanned_artists]
+        if graph is not None and artist_handle and scanned_artists:
+            graph.set_following(artist_handle, following)
+            graph.save()
+
+        if depth > 0:
+            for _, _, next_artist_url, _ in scanned_artists:
+                enqueue_artist(queue, next_artist_url, depth - 1)
+        return {"handle": artist_handle, "following": following, "artists": [list(row) for row in scanned_artists]}
+
+    return await work_queue(queue, curate_job, lease_seconds=lease_seconds)
 
 async def _curate_single_artist(driver, artist_url):
     """
     Scrapes the followed list of a given artist, saves new artists to the CSV,
     and returns a list of all scanned artists on the page.
     """
+    # Imported here so the CSV helpers above work without Selenium installed.
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     os.makedirs(os.path.dirname(CURATED_ARTISTS_FILE), exist_ok=True)
 
     following_url = f"{artist_url.replace('x.com', 'twitter.com')}/following"
@@ -71,9 +178,9 @@ async def _curate_single_artist(driver, artist_url):
 
     # Add the artist being curated if they are new
     try:
-        artist_handle_match = re.search(r'(?:twitter|x)\.com/([^/]+)', artist_url)
-        if artist_handle_match:
-            artist_handle = f"@{artist_handle_match.group(1)}"
+        artist_handle = handle_from_url(artist_url)
+        if artist_handle:
+            artist_handle = f"@{artist_handle}"
             if artist_handle not in existing_handles:
                 handle_element = WebDriverWait(driver, 10).until(
                     EC.presence_of_element_located((By.XPATH, f"//span[text()='{artist_handle}']"))
@@ -105,13 +212,13 @@ async def _curate_single_artist(driver, artist_url):
                 if not user_path or user_path in processed_users_in_run:
                     continue
 
-                if not (user_path.startswith('https://twitter.com/') or user_path.startswith('https://x.com/')):
+                if handle_from_url(user_path) is None:
                     continue
                 
                 processed_users_in_run.add(user_path)
                 
                 user_url = user_path
-                user_path_slug = user_url.replace('https://twitter.com', '').replace('https://x.com', '')
+                user_path_slug = f"/{handle_from_url(user_url)}"
 
                 name_element_link = user_element.find_element(By.CSS_SELECTOR, f'a[href="{user_path_slug}"]:not([tabindex="-1"])')
                 handle_element_link = user_element.find_element(By.CSS_SELECTOR, f'a[href="{user_path_slug}"][tabindex="-1"]')
@@ -140,13 +247,8 @@ async def _curate_single_artist(driver, artist_url):
 
     if new_artists_to_write:
         print(f"Found {len(new_artists_to_write)} new artists to add.")
-        file_exists = os.path.exists(CURATED_ARTISTS_FILE)
-        with open(CURATED_ARTISTS_FILE, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            if not file_exists or os.path.getsize(CURATED_ARTISTS_FILE) == 0:
-                writer.writerow(["username", "handle", "url", "timestamp"])
-            writer.writerows(new_artists_to_write)
-        print(f"Successfully added {len(new_artists_to_write)} new artists to {CURATED_ARTISTS_FILE}")
+        added = append_curated_artists(new_artists_to_write)
+        print(f"Successfully added {added} new artists to {CURATED_ARTISTS_FILE}")
     else:
         print("No new artists found to add.")
 
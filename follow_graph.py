@@ -0,0 +1,200 @@
+import os
+import csv
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from config import config
+from curator import get_curated_artists
+
+def normalize_handle(handle: str) -> str:
+    return "@" + handle.strip().lstrip("@").lower()
+
+class FollowGraph:
+    """
+    The artist -> followed-account graph seen by the curator, in CSR layout.
+
+    Node i's followed accounts are indices[indptr[i]:indptr[i + 1]]. Re-crawling
+    an artist replaces its out-edges; updates are buffered and merged into the
+    CSR arrays in one vectorized pass when the graph is saved or ranked.
+    """
+    def __init__(self, graph_file: str = config.FOLLOW_GRAPH_FILE):
+        self.graph_file = graph_file
+        self.handles: List[str] = []
+        self.node_ids: Dict[str, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self._pending: Dict[int, np.ndarray] = {}
+        if os.path.exists(graph_file):
+            self._load()
+
+    def _load(self):
+        with np.load(self.graph_file) as data:
+            self.handles = data["handles"].tolist()
+            self.indptr = data["indptr"]
+            self.indices = data["indices"]
+        self.node_ids = {handle: i for i, handle in enumerate(self.handles)}
+
+    @property
+    def node_count(self) -> int:
+        return len(self.handles)
+
+    @property
+    def edge_count(self) -> int:
+        self._compact()
+        return len(self.indices)
+
+    def node_id(self, handle: str) -> int:
+        handle = normalize_handle(handle)
+        node = self.node_ids.get(handle)
+        if node is None:
+            node = len(self.handles)
+            self.handles.append(handle)
+            self.node_ids[handle] = node
+        return node
+
+    def set_following(self, handle: str, followed_handles: Iterable[str]):
+        """Records (or replaces) the accounts that handle follows."""
+        source = self.node_id(handle)
+        targets = {self.node_id(h) for h in followed_handles if h} - {source}
+        self._pending[source] = np.fromiter(sorted(targets), dtype=np.int32, count=len(targets))
+
+    def _compact(self):
+        if not self._pending and len(self.indptr) == self.node_count + 1:
+            return
+
+        n = self.node_count
+        old_nodes = len(self.indptr) - 1
+        sources = np.repeat(np.arange(old_nodes, dtype=np.int32), np.diff(self.indptr))
+        replaced = np.zeros(n, dtype=bool)
+        replaced[list(self._pending)] = True
+        keep = ~replaced[sources]
+
+        new_sources = [sources[keep]]
+        new_targets = [self.indices[keep]]
+        for source, targets in self._pending.items():
+            new_sources.append(np.full(len(targets), source, dtype=np.int32))
+            new_targets.append(targets)
+        sources = np.concatenate(new_sources)
+        targets = np.concatenate(new_targets)
+
+        order = np.argsort(sources, kind="stable")
+        self.indices = targets[order].astype(np.int32)
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=n))]).astype(np.int64)
+        self._pending = {}
+
+    def save(self):
+        self._compact()
+        graph_dir = os.path.dirname(self.graph_file)
+        if graph_dir:
+            os.makedirs(graph_dir, exist_ok=True)
+        tmp_path = f"{self.graph_file}.tmp.npz"
+        np.savez_compressed(tmp_path, handles=np.array(self.handles, dtype=str),
+                            indptr=self.indptr, indices=self.indices)
+        os.replace(tmp_path, self.graph_file)
+
+    def out_degree(self) -> np.ndarray:
+        self._compact()
+        return np.diff(self.indptr)
+
+    def seed_vector(self, seed_handles: Iterable[str]) -> np.ndarray:
+        seeds = np.zeros(self.node_count, dtype=np.float64)
+        for handle in seed_handles:
+            node = self.node_ids.get(normalize_handle(handle))
+            if node is not None:
+                seeds[node] = 1.0
+        return seeds
+
+    def cofollow_scores(self, seed_handles: Iterable[str]) -> np.ndarray:
+        """Counts, for every account, how many seed accounts follow it."""
+        self._compact()
+        seeds = self.seed_vector(seed_handles)
+        sources = np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+        return np.bincount(self.indices, weights=seeds[sources], minlength=self.node_count)
+
+    def personalized_pagerank(self, seed_handles: Iterable[str], damping: float = 0.85,
+                              max_iterations: int = 100, tolerance: float = 1e-9) -> np.ndarray:
+        """
+        Runs personalized PageRank restarting at the seed accounts.
+
+        Each iteration is one np.bincount over the edge list, so the cost is
+        linear in the number of edges. Rank held by accounts with no recorded
+        follows (not crawled yet) is returned to the seeds.
+        """
+        self._compact()
+        n = self.node_count
+        restart = self.seed_vector(seed_handles)
+        if not restart.any():
+            return np.zeros(n)
+        restart /= restart.sum()
+
+        out_degree = np.diff(self.indptr).astype(np.float64)
+        sources = np.repeat(np.arange(n), np.diff(self.indptr))
+        dangling = out_degree == 0
+        inv_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+
+        rank = restart.copy()
+        for _ in range(max_iterations):
+            spread = np.bincount(self.indices, weights=(rank * inv_degree)[sources], minlength=n)
+            new_rank = damping * spread + (damping * rank[dangling].sum() + 1 - damping) * restart
+            converged = np.abs(new_rank - rank).sum() < tolerance
+            rank = new_rank
+            if converged:
+                break
+        return rank
+
+def rank_candidates(graph: FollowGraph, seed_handles: Iterable[str], method: str = "pagerank",
+                    top: int = 50, include_seeds: bool = False) -> List[dict]:
+    """Scores every account in the graph from the seeds and returns the best candidates."""
+    seed_handles = {normalize_handle(h) for h in seed_handles}
+    if method == "pagerank":
+        scores = graph.personalized_pagerank(seed_handles)
+    else:
+        scores = graph.cofollow_scores(seed_handles)
+    followed_by_seeds = graph.cofollow_scores(seed_handles)
+    crawled = graph.out_degree() > 0
+
+    candidates = []
+    for node in np.argsort(-scores, kind="stable"):
+        if scores[node] <= 0 or len(candidates) >= top:
+            break
+        handle = graph.handles[node]
+        if handle in seed_handles and not include_seeds:
+            continue
+        candidates.append({
+            "handle": handle,
+            "score": float(scores[node]),
+            "followed_by_seeds": int(followed_by_seeds[node]),
+            "crawled": bool(crawled[node]),
+        })
+    return candidates
+
+def run_rank(args):
+    """Ranks accounts in the follow graph as crawl/scrape candidates."""
+    if not os.path.exists(args.graph_file):
+        print(f"Error: {args.graph_file} not found. Run curate first to record follow edges.")
+        return
+
+    seed_handles = get_curated_artists(args.seed_csv)
+    if not seed_handles:
+        print(f"Error: No seed artists found in {args.seed_csv}.")
+        return
+
+    graph = FollowGraph(args.graph_file)
+    print(f"Loaded follow graph with {graph.node_count} accounts and {graph.edge_count} edges.")
+    candidates = rank_candidates(graph, seed_handles, method=args.method, top=args.top,
+                                 include_seeds=args.include_seeds)
+
+    for position, candidate in enumerate(candidates, start=1):
+        status = "crawled" if candidate["crawled"] else "not crawled"
+        print(f"{position:>4}. {candidate['handle']:<24} score {candidate['score']:.6f} | "
+              f"followed by {candidate['followed_by_seeds']} seeds | {status}")
+
+    if args.output_csv:
+        with open(args.output_csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["username", "handle", "url", "score"])
+            for candidate in candidates:
+                handle = candidate["handle"]
+                writer.writerow([handle.lstrip("@"), handle, f"https://x.com/{handle.lstrip('@')}", candidate["score"]])
+        print(f"Saved {len(candidates)} candidates to {args.output_csv}")
@@ -0,0 +1,679 @@
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import codec
+from config import config
+
+DEFAULT_LEASE_SECONDS = config.JOB_LEASE_SECONDS
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_SECONDS = 30
+JOB_STATES = ("pending", "leased", "done", "failed")
+
+class JobDeferred(Exception):
+    """Raised by a work_queue handler to hand its job back and retry it later."""
+
+@dataclass
+class Lease:
+    """A job handed to one worker until it completes, fails or the lease expires."""
+    key: str
+    payload: dict
+    token: str
+    attempts: int
+    lease_seconds: float
+
+class JobQueue(ABC):
+    """
+    A named queue of jobs shared by every scraping box.
+
+    Jobs are keyed, so enqueuing a key that is already known is a no-op and
+    every worker can safely seed the same queue; done and failed jobs are only
+    re-opened when a seed starts a new round (see seed). A worker leases one
+    job at a time and must heartbeat before the lease expires; expired leases
+    are requeued (or failed after max_attempts) by the next lease call, so a
+    crashed box never strands its work. Results are stored in the queue so
+    they can be collected centrally.
+    """
+    def __init__(self, name: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.name = name
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    def enqueue(self, key: str, payload: dict) -> bool:
+        """Adds a job unless key is already known. Returns True if it was added."""
+
+    @abstractmethod
+    def seed(self, jobs: List[Tuple[str, dict]], budgets: Optional[Dict[str, int]] = None) -> int:
+        """
+        Atomically enqueues (key, payload) jobs from a seeding box.
+
+        If the previous round is over (see round_over), the seed starts a new
+        one: counters are reset and done or failed jobs go back to pending with
+        the new payload and fresh attempts. Otherwise only unknown keys are
+        added. budgets maps counter names to their limits.
+
+        Returns:
+            The number of jobs added or re-opened.
+        """
+
+    @abstractmethod
+    def lease(self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Lease]:
+        """Leases the oldest pending job, or returns None if there is none."""
+
+    @abstractmethod
+    def heartbeat(self, lease: Lease) -> bool:
+        """Extends a lease. Returns False if it was lost to expiry."""
+
+    @abstractmethod
+    def complete(self, lease: Lease, result: dict) -> bool:
+        """Marks a leased job done. Returns False (and drops result) if the lease was lost."""
+
+    @abstractmethod
+    def fail(self, lease: Lease, error: str) -> bool:
+        """Requeues a leased job, or marks it failed once it has used max_attempts."""
+
+    @abstractmethod
+    def release(self, lease: Lease) -> bool:
+        """Returns a leased job to the front of the queue without counting the attempt."""
+
+    @abstractmethod
+    def reserve(self, counter: str, amount: int, limit: int) -> int:
+        """Atomically takes up to amount from a shared counter capped at limit; returns what was granted."""
+
+    @abstractmethod
+    def add_to_counter(self, counter: str, amount: int):
+        """Atomically adds amount (which may be negative) to a shared counter."""
+
+    @abstractmethod
+    def status(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Returns (job count per state, counter values)."""
+
+    @abstractmethod
+    def results(self) -> List[Tuple[str, str, dict]]:
+        """Returns (key, worker, result) for every completed job."""
+
+    @abstractmethod
+    def failures(self) -> List[Tuple[str, str]]:
+        """Returns (key, last error) for every failed job."""
+
+    @abstractmethod
+    def requeue_failed(self) -> int:
+        """Moves failed jobs back to pending with fresh attempts; returns how many."""
+
+    @abstractmethod
+    def reset(self):
+        """Deletes every job and counter of this queue."""
+
+class SQLiteJobQueue(JobQueue):
+    """
+    A job queue in a SQLite file, for one box or several sharing a filesystem.
+
+    Every operation runs in its own short BEGIN IMMEDIATE transaction on a
+    fresh connection, so it is safe from the heartbeat thread too. Lease
+    expiry uses each box's own clock, so shared-file setups need synced clocks
+    and a filesystem with working POSIX locks; use the Redis backend otherwise.
+    """
+    def __init__(self, path: str, name: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        super().__init__(name, max_attempts)
+        self.path = path
+        queue_dir = os.path.dirname(path)
+        if queue_dir:
+            os.makedirs(queue_dir, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                       queue TEXT NOT NULL,
+                       key TEXT NOT NULL,
+                       payload TEXT NOT NULL,
+                       state TEXT NOT NULL DEFAULT 'pending',
+                       priority INTEGER NOT NULL DEFAULT 0,
+                       worker TEXT,
+                       token TEXT,
+                       lease_expires REAL,
+                       attempts INTEGER NOT NULL DEFAULT 0,
+                       result TEXT,
+                       error TEXT,
+                       updated_at REAL,
+                       PRIMARY KEY (queue, key))"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (queue, state, priority)")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS counters (
+                       queue TEXT NOT NULL,
+                       name TEXT NOT NULL,
+                       value INTEGER NOT NULL,
+                       PRIMARY KEY (queue, name))"""
+            )
+
+    def _transaction(self):
+        return _SQLiteTransaction(self.path)
+
+    def enqueue(self, key: str, payload: dict) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (queue, key, payload, updated_at) VALUES (?, ?, ?, ?)",
+                (self.name, key, codec.dumps(payload), time.time()),
+            )
+            return cursor.rowcount == 1
+
+    def seed(self, jobs: List[Tuple[str, dict]], budgets: Optional[Dict[str, int]] = None) -> int:
+        now = time.time()
+        with self._transaction() as conn:
+            self._expire_leases(conn, now)
+            new_round = round_over(*self._status(conn), budgets or {})
+            if new_round:
+                conn.execute("DELETE FROM counters WHERE queue = ?", (self.name,))
+            added = 0
+            for key, payload in jobs:
+                added += conn.execute(
+                    """INSERT INTO jobs (queue, key, payload, updated_at) VALUES (?, ?, ?, ?)
+                       ON CONFLICT (queue, key) DO UPDATE SET state = 'pending', payload = excluded.payload,
+                                                              priority = 0, attempts = 0, error = NULL,
+                                                              updated_at = excluded.updated_at
+                       WHERE ? AND jobs.state IN ('done', 'failed')""",
+                    (self.name, key, codec.dumps(payload), now, new_round),
+                ).rowcount
+        return added
+
+    def _expire_leases(self, conn: sqlite3.Connection, now: float):
+        conn.execute(
+            """UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                               token = NULL, lease_expires = NULL, error = 'lease expired', updated_at = ?
+               WHERE queue = ? AND state = 'leased' AND lease_expires < ?""",
+            (self.max_attempts, now, self.name, now),
+        )
+
+    def lease(self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Lease]:
+        now = time.time()
+        with self._transaction() as conn:
+            self._expire_leases(conn, now)
+            row = conn.execute(
+                """SELECT key, payload, attempts FROM jobs WHERE queue = ? AND state = 'pending'
+                   ORDER BY priority, rowid LIMIT 1""",
+                (self.name,),
+            ).fetchone()
+            if row is None:
+                return None
+            token = uuid.uuid4().hex
+            conn.execute(
+                """UPDATE jobs SET state = 'leased', priority = 0, worker = ?, token = ?, lease_expires = ?,
+                                   attempts = attempts + 1, updated_at = ?
+                   WHERE queue = ? AND key = ?""",
+                (worker, token, now + lease_seconds, now, self.name, row[0]),
+            )
+        return Lease(row[0], codec.loads(row[1]), token, row[2] + 1, lease_seconds)
+
+    def _update_lease(self, lease: Lease, assignments: str, params: tuple) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"""UPDATE jobs SET {assignments}, updated_at = ?
+                    WHERE queue = ? AND key = ? AND token = ? AND state = 'leased'""",
+                (*params, time.time(), self.name, lease.key, lease.token),
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, lease: Lease) -> bool:
+        return self._update_lease(lease, "lease_expires = ?", (time.time() + lease.lease_seconds,))
+
+    def complete(self, lease: Lease, result: dict) -> bool:
+        return self._update_lease(lease, "state = 'done', token = NULL, lease_expires = NULL, result = ?",
+                                  (codec.dumps(result),))
+
+    def fail(self, lease: Lease, error: str) -> bool:
+        return self._update_lease(
+            lease,
+            "state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "token = NULL, lease_expires = NULL, error = ?",
+            (self.max_attempts, error),
+        )
+
+    def release(self, lease: Lease) -> bool:
+        return self._update_lease(
+            lease, "state = 'pending', priority = -1, token = NULL, lease_expires = NULL, attempts = attempts - 1", ())
+
+    def reserve(self, counter: str, amount: int, limit: int) -> int:
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM counters WHERE queue = ? AND name = ?",
+                               (self.name, counter)).fetchone()
+            granted = max(0, min(amount, limit - (row[0] if row else 0)))
+            conn.execute(
+                """INSERT INTO counters (queue, name, value) VALUES (?, ?, ?)
+                   ON CONFLICT (queue, name) DO UPDATE SET value = value + excluded.value""",
+                (self.name, counter, granted),
+            )
+        return granted
+
+    def add_to_counter(self, counter: str, amount: int):
+        with self._transaction() as conn:
+            conn.execute(
+                """INSERT INTO counters (queue, name, value) VALUES (?, ?, ?)
+                   ON CONFLICT (queue, name) DO UPDATE SET value = value + excluded.value""",
+                (self.name, counter, amount),
+            )
+
+    def status(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        with self._transaction() as conn:
+            return self._status(conn)
+
+    def _status(self, conn: sqlite3.Connection) -> Tuple[Dict[str, int], Dict[str, int]]:
+        states = dict(conn.execute("SELECT state, COUNT(*) FROM jobs WHERE queue = ? GROUP BY state",
+                                   (self.name,)).fetchall())
+        counters = dict(conn.execute("SELECT name, value FROM counters WHERE queue = ?",
+                                     (self.name,)).fetchall())
+        return {state: states.get(state, 0) for state in JOB_STATES}, counters
+
+    def results(self) -> List[Tuple[str, str, dict]]:
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT key, worker, result FROM jobs WHERE queue = ? AND state = 'done' ORDER BY rowid",
+                                (self.name,)).fetchall()
+        return [(key, worker, codec.loads(result)) for key, worker, result in rows]
+
+    def failures(self) -> List[Tuple[str, str]]:
+        with self._transaction() as conn:
+            return conn.execute("SELECT key, error FROM jobs WHERE queue = ? AND state = 'failed' ORDER BY rowid",
+                                (self.name,)).fetchall()
+
+    def requeue_failed(self) -> int:
+        with self._transaction() as conn:
+            return conn.execute("UPDATE jobs SET state = 'pending', attempts = 0 WHERE queue = ? AND state = 'failed'",
+                                (self.name,)).rowcount
+
+    def reset(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM jobs WHERE queue = ?", (self.name,))
+            conn.execute("DELETE FROM counters WHERE queue = ?", (self.name,))
+
+class _SQLiteTransaction:
+    """Opens a connection, runs one BEGIN IMMEDIATE transaction and closes it."""
+    def __init__(self, path: str):
+        self.path = path
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.conn.close()
+
+# Each script runs atomically on the Redis server and takes the time from the
+# server, so boxes with skewed clocks still agree on lease expiry.
+_REDIS_NOW = """
+if redis.replicate_commands then redis.replicate_commands() end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+"""
+
+_REDIS_ENQUEUE = """
+if redis.call('HSETNX', KEYS[1], ARGV[1], ARGV[2]) == 0 then return 0 end
+redis.call('HSET', KEYS[2], ARGV[1], 'pending')
+redis.call('RPUSH', KEYS[3], ARGV[1])
+return 1
+"""
+
+# Requeues (or fails) expired leases. Scripts using it take the KEYS of
+# _REDIS_LEASE and set max_attempts first.
+_REDIS_EXPIRE = """
+for _, key in ipairs(redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', now)) do
+  redis.call('ZREM', KEYS[4], key)
+  redis.call('HDEL', KEYS[5], key)
+  redis.call('HSET', KEYS[8], key, 'lease expired')
+  if tonumber(redis.call('HGET', KEYS[6], key) or '0') >= max_attempts then
+    redis.call('HSET', KEYS[2], key, 'failed')
+  else
+    redis.call('HSET', KEYS[2], key, 'pending')
+    redis.call('RPUSH', KEYS[3], key)
+  end
+end
+"""
+
+# KEYS: jobs, state, pending, leases, tokens, attempts, workers, errors
+# ARGV: lease_seconds, worker, token, max_attempts
+_REDIS_LEASE = _REDIS_NOW + "local max_attempts = tonumber(ARGV[4])" + _REDIS_EXPIRE + """
+local key = redis.call('LPOP', KEYS[3])
+if not key then return false end
+local attempts = redis.call('HINCRBY', KEYS[6], key, 1)
+redis.call('ZADD', KEYS[4], now + tonumber(ARGV[1]), key)
+redis.call('HSET', KEYS[5], key, ARGV[3])
+redis.call('HSET', KEYS[7], key, ARGV[2])
+redis.call('HSET', KEYS[2], key, 'leased')
+return {key, redis.call('HGET', KEYS[1], key), attempts}
+"""
+
+# KEYS: leases, tokens; ARGV: key, token, lease_seconds
+_REDIS_HEARTBEAT = _REDIS_NOW + """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[1])
+return 1
+"""
+
+# KEYS: leases, tokens, state, pending, attempts, results, errors
+# ARGV: key, token, outcome ('done', 'fail' or 'release'), result or error, max_attempts
+_REDIS_FINISH = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+local state = 'pending'
+if ARGV[3] == 'done' then
+  state = 'done'
+  redis.call('HSET', KEYS[6], ARGV[1], ARGV[4])
+elseif ARGV[3] == 'release' then
+  redis.call('HINCRBY', KEYS[5], ARGV[1], -1)
+  redis.call('LPUSH', KEYS[4], ARGV[1])
+else
+  redis.call('HSET', KEYS[7], ARGV[1], ARGV[4])
+  if tonumber(redis.call('HGET', KEYS[5], ARGV[1])) >= tonumber(ARGV[5]) then
+    state = 'failed'
+  else
+    redis.call('RPUSH', KEYS[4], ARGV[1])
+  end
+end
+redis.call('HSET', KEYS[3], ARGV[1], state)
+return 1
+"""
+
+# KEYS: jobs, state, pending, leases, tokens, attempts, workers, errors, counters
+# ARGV: max_attempts, budget count, (counter, limit) per budget, (key, payload) per job
+_REDIS_SEED = _REDIS_NOW + "local max_attempts = tonumber(ARGV[1])" + _REDIS_EXPIRE + """
+local leased, pending = 0, 0
+for _, state in ipairs(redis.call('HVALS', KEYS[2])) do
+  if state == 'leased' then leased = leased + 1 elseif state == 'pending' then pending = pending + 1 end
+end
+local new_round = leased == 0 and pending == 0
+local i = 3
+for _ = 1, tonumber(ARGV[2]) do
+  local used = tonumber(redis.call('HGET', KEYS[9], ARGV[i]) or '0')
+  if leased == 0 and used >= tonumber(ARGV[i + 1]) then new_round = true end
+  i = i + 2
+end
+if new_round then redis.call('DEL', KEYS[9]) end
+local added = 0
+for j = i, #ARGV, 2 do
+  local key, payload = ARGV[j], ARGV[j + 1]
+  local queued = redis.call('HSETNX', KEYS[1], key, payload) == 1
+  local state = redis.call('HGET', KEYS[2], key)
+  if not queued and new_round and (state == 'done' or state == 'failed') then
+    redis.call('HSET', KEYS[1], key, payload)
+    redis.call('HSET', KEYS[6], key, 0)
+    queued = true
+  end
+  if queued then
+    redis.call('HSET', KEYS[2], key, 'pending')
+    redis.call('RPUSH', KEYS[3], key)
+    added = added + 1
+  end
+end
+return added
+"""
+
+# KEYS: counters; ARGV: name, amount, limit
+_REDIS_RESERVE = """
+local used = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+local granted = math.max(0, math.min(tonumber(ARGV[2]), tonumber(ARGV[3]) - used))
+redis.call('HINCRBY', KEYS[1], ARGV[1], granted)
+return granted
+"""
+
+class RedisJobQueue(JobQueue):
+    """
+    A job queue on a Redis-compatible server (Redis, Valkey, KeyDB, ...), for
+    boxes that do not share a filesystem. Requires the optional redis package.
+
+    Each state change is a server-side Lua script, so leasing, heartbeats and
+    completion are atomic across workers.
+    """
+    def __init__(self, url: str, name: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        super().__init__(name, max_attempts)
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        prefix = f"xscraper:{name}:"
+        self.keys = {part: prefix + part for part in
+                     ("jobs", "state", "pending", "leases", "tokens", "attempts", "workers", "results", "errors",
+                      "counters")}
+        self._enqueue = self.client.register_script(_REDIS_ENQUEUE)
+        self._seed = self.client.register_script(_REDIS_SEED)
+        self._lease = self.client.register_script(_REDIS_LEASE)
+        self._heartbeat = self.client.register_script(_REDIS_HEARTBEAT)
+        self._finish = self.client.register_script(_REDIS_FINISH)
+        self._reserve = self.client.register_script(_REDIS_RESERVE)
+
+    def _k(self, *parts):
+        return [self.keys[part] for part in parts]
+
+    def enqueue(self, key: str, payload: dict) -> bool:
+        return bool(self._enqueue(keys=self._k("jobs", "state", "pending"), args=[key, codec.dumps(payload)]))
+
+    def seed(self, jobs: List[Tuple[str, dict]], budgets: Optional[Dict[str, int]] = None) -> int:
+        budgets = budgets or {}
+        args = [self.max_attempts, len(budgets)]
+        for counter, limit in budgets.items():
+            args += [counter, limit]
+        for key, payload in jobs:
+            args += [key, codec.dumps(payload)]
+        return int(self._seed(
+            keys=self._k("jobs", "state", "pending", "leases", "tokens", "attempts", "workers", "errors", "counters"),
+            args=args,
+        ))
+
+    def lease(self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Lease]:
+        token = uuid.uuid4().hex
+        leased = self._lease(
+            keys=self._k("jobs", "state", "pending", "leases", "tokens", "attempts", "workers", "errors"),
+            args=[lease_seconds, worker, token, self.max_attempts],
+        )
+        if not leased:
+            return None
+        key, payload, attempts = leased
+        return Lease(key, codec.loads(payload), token, int(attempts), lease_seconds)
+
+    def heartbeat(self, lease: Lease) -> bool:
+        return bool(self._heartbeat(keys=self._k("leases", "tokens"),
+                                    args=[lease.key, lease.token, lease.lease_seconds]))
+
+    def _finish_lease(self, lease: Lease, outcome: str, value: str = "") -> bool:
+        return bool(self._finish(
+            keys=self._k("leases", "tokens", "state", "pending", "attempts", "results", "errors"),
+            args=[lease.key, lease.token, outcome, value, self.max_attempts],
+        ))
+
+    def complete(self, lease: Lease, result: dict) -> bool:
+        return self._finish_lease(lease, "done", codec.dumps(result))
+
+    def fail(self, lease: Lease, error: str) -> bool:
+        return self._finish_lease(lease, "fail", error)
+
+    def release(self, lease: Lease) -> bool:
+        return self._finish_lease(lease, "release")
+
+    def reserve(self, counter: str, amount: int, limit: int) -> int:
+        return int(self._reserve(keys=self._k("counters"), args=[counter, amount, limit]))
+
+    def add_to_counter(self, counter: str, amount: int):
+        self.client.hincrby(self.keys["counters"], counter, amount)
+
+    def status(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        states = Counter(self.client.hvals(self.keys["state"]))
+        counters = {name: int(value) for name, value in self.client.hgetall(self.keys["counters"]).items()}
+        return {state: states.get(state, 0) for state in JOB_STATES}, counters
+
+    def results(self) -> List[Tuple[str, str, dict]]:
+        workers = self.client.hgetall(self.keys["workers"])
+        states = self.client.hgetall(self.keys["state"])
+        return [(key, workers.get(key), codec.loads(result))
+                for key, result in self.client.hgetall(self.keys["results"]).items() if states.get(key) == "done"]
+
+    def failures(self) -> List[Tuple[str, str]]:
+        errors = self.client.hgetall(self.keys["errors"])
+        return [(key, errors.get(key)) for key, state in self.client.hgetall(self.keys["state"]).items()
+                if state == "failed"]
+
+    def requeue_failed(self) -> int:
+        # An admin operation run while workers are idle, so it need not be atomic.
+        failed = [key for key, state in self.client.hgetall(self.keys["state"]).items() if state == "failed"]
+        for key in failed:
+            self.client.hset(self.keys["state"], key, "pending")
+            self.client.hset(self.keys["attempts"], key, 0)
+            self.client.rpush(self.keys["pending"], key)
+        return len(failed)
+
+    def reset(self):
+        self.client.delete(*self.keys.values())
+
+def open_job_queue(location: str, name: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> JobQueue:
+    """
+    Opens a queue by location: a redis:// (or rediss://, unix://) URL for the
+    Redis backend, anything else as the path of a SQLite file.
+    """
+    if location.startswith(("redis://", "rediss://", "unix://")):
+        return RedisJobQueue(location, name, max_attempts)
+    return SQLiteJobQueue(location, name, max_attempts)
+
+def round_over(states: Dict[str, int], counters: Dict[str, int], budgets: Dict[str, int]) -> bool:
+    """
+    Returns whether a queue's current round is over, so a seed starts a new one.
+
+    A round is over once no job is leased and either nothing is pending or one
+    of budgets (counter name -> limit) is spent, since a round that stopped at
+    its --max-tweets budget leaves the remaining artists pending. While any job
+    is leased the round is still running, which keeps a second seeding box
+    from resetting a budget workers are already reserving from.
+    """
+    if states.get("leased"):
+        return False
+    return not states.get("pending") or any(counters.get(name, 0) >= limit for name, limit in budgets.items())
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class LeaseHeartbeat:
+    """
+    Heartbeats a lease from a background thread while the job runs.
+
+    Scraping blocks the event loop in Selenium calls, so the heartbeat cannot be
+    an asyncio task.
+    """
+    def __init__(self, queue: JobQueue, lease: Lease):
+        self.queue = queue
+        self.lease = lease
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        interval = self.lease.lease_seconds / 3
+        while not self._stop.wait(interval):
+            try:
+                if not self.queue.heartbeat(self.lease):
+                    self.lost = True
+                    return
+            except Exception as e:
+                print(f"Heartbeat for {self.lease.key} failed: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+async def work_queue(queue: JobQueue, handler: Callable[[Lease], Awaitable[dict]],
+                     lease_seconds: float = DEFAULT_LEASE_SECONDS, poll_seconds: float = POLL_SECONDS) -> int:
+    """
+    Leases and runs jobs until the queue is drained.
+
+    When nothing is pending but other workers still hold leases, keeps polling,
+    since they may add jobs (crawl frontier) or expire and be requeued. The
+    handler returns the result to store, or raises JobDeferred to hand the job
+    back (e.g. a shared limit is held by other workers); the worker then polls
+    while other leases are outstanding and stops once none are. Any other
+    exception fails the job.
+
+    Returns:
+        The number of jobs this worker completed.
+    """
+    worker = worker_id()
+    completed = 0
+    while True:
+        lease = queue.lease(worker, lease_seconds)
+        if lease is None:
+            states, _ = queue.status()
+            if not states["leased"]:
+                return completed
+            print(f"Queue '{queue.name}' has no pending jobs; waiting on {states['leased']} leased ones...")
+            await asyncio.sleep(poll_seconds)
+            continue
+
+        print(f"Leased job {lease.key} (attempt {lease.attempts}).")
+        with LeaseHeartbeat(queue, lease) as heartbeat:
+            try:
+                result = await handler(lease)
+            except JobDeferred as e:
+                queue.release(lease)
+                states, _ = queue.status()
+                if not states["leased"]:
+                    print(f"{e} No other worker holds a job. Stopping.")
+                    return completed
+                print(f"{e} Handed {lease.key} back; waiting on {states['leased']} leased jobs...")
+                await asyncio.sleep(poll_seconds)
+                continue
+            except Exception as e:
+                print(f"Job {lease.key} failed: {e}")
+                queue.fail(lease, str(e))
+                continue
+
+        if heartbeat.lost or not queue.complete(lease, result):
+            print(f"Lease on {lease.key} expired before it finished; another worker will redo it.")
+            continue
+        completed += 1
+
+def run_jobs(args):
+    """Prints a job queue's progress and collected results, and manages failed jobs."""
+    queue = open_job_queue(args.queue, args.name)
+    if args.reset:
+        queue.reset()
+        print(f"Cleared queue '{args.name}'.")
+        return
+    if args.requeue_failed:
+        print(f"Requeued {queue.requeue_failed()} failed jobs.")
+
+    states, counters = queue.status()
+    print(f"Queue '{args.name}': " + ", ".join(f"{states[state]} {state}" for state in JOB_STATES))
+    for name, value in sorted(counters.items()):
+        print(f"  counter {name}: {value}")
+
+    results = queue.results()
+    per_worker = Counter(worker for _, worker, _ in results)
+    for worker, count in per_worker.most_common():
+        print(f"  {worker}: {count} jobs done")
+    for key, error in queue.failures():
+        print(f"  failed {key}: {error}")
+
+    if args.merge_graph or args.merge_artists:
+        from curator import append_curated_artists
+
+        rows = [row for _, _, result in results for row in result.get("artists", [])]
+        if args.merge_artists:
+            added = append_curated_artists(rows, args.merge_artists)
+            print(f"Added {added} new artists to {args.merge_artists}")
+        if args.merge_graph:
+            from follow_graph import FollowGraph
+
+            graph = FollowGraph(args.merge_graph)
+            for _, _, result in results:
+                if result.get("handle") and result.get("following"):
+                    graph.set_following(result["handle"], result["following"])
+            graph.save()
+            print(f"Follow graph {args.merge_graph} now has {graph.node_count} accounts and {graph.edge_count} edges.")
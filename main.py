@@ -1,18 +1,45 @@
 import argparse
-import asyncio
-import json
+import importlib
 import os
 import traceback
 import datetime
-import csv
 from urllib.parse import quote
-from scraper import XScraper
-from downloader import download_media
-from curator import curate_recursively
-from selector import run_selector
+from choices import SORT_COLUMNS, TREND_SORT_KEYS
+from config import config
+from curator import CURATED_ARTISTS_FILE, read_usernames
+
+# Subcommands are resolved to "module:function" and imported only when run, so
+# offline commands never load Selenium, aiohttp, NumPy or Pillow unless they
+# actually use them. The browser commands live in this module and import their
+# dependencies inside the function. Only commands that drive a browser or a job
+# queue are async; the offline ones are plain functions (see main()).
+COMMANDS = {
+    "scrape": "main:run_scraper",
+    "curate": "main:run_curator",
+    "user_scrape": "main:run_user_scraper",
+    "select": "selector:run_selector",
+    "dedupe": "media_index:run_dedupe",
+    "search": "search_index:run_search",
+    "stats_ingest": "stats_store:run_stats_ingest",
+    "plan": "scheduler:run_plan",
+    "rank": "follow_graph:run_rank",
+    "jobs": "job_queue:run_jobs",
+}
+
+def resolve_command(command):
+    module_name, function_name = COMMANDS[command].split(":")
+    if module_name == "main":
+        return globals()[function_name]
+    return getattr(importlib.import_module(module_name), function_name)
 
 async def run_scraper(args):
     """Runs the X/Twitter timeline scraper."""
+    from scraper import XScraper
+    from downloader import download_media
+    from media_normalizer import prepare_media_downloads
+    from records import write_tweets
+    from stats_store import record_run
+
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     run_output_dir = os.path.join(args.output_dir, timestamp)
 
@@ -34,21 +61,17 @@ async def run_scraper(args):
 
             print(f"Scraped {len(collected_tweets)} tweets. Starting media download...")
             
-            all_media_urls = []
-            for tweet in collected_tweets:
-                all_media_urls.extend(tweet["media_urls"])
+            all_media_urls = await prepare_media_downloads(collected_tweets)
 
             downloaded_media_paths = await download_media(all_media_urls, media_output_path)
 
             download_map = {url: path for url, path in downloaded_media_paths}
             
-            with open(jsonl_output_path, "w", encoding="utf-8") as f:
-                for tweet in collected_tweets:
-                    local_media_paths = []
-                    for original_url in tweet["media_urls"]:
-                        local_media_paths.append(download_map.get(original_url, original_url))
-                    tweet["media_local_paths"] = local_media_paths
-                    f.write(json.dumps(tweet, ensure_ascii=False) + "\n")
+            for tweet in collected_tweets:
+                tweet.media_local_paths = [download_map.get(url, url) for url in tweet.media_urls]
+            write_tweets(jsonl_output_path, collected_tweets)
+
+            record_run(collected_tweets, jsonl_output_path)
             
             print(f"Scraping complete. Data saved to {jsonl_output_path}")
             print(f"Downloaded media to {media_output_path}")
@@ -59,12 +82,120 @@ async def run_scraper(args):
         if scraper:
             scraper.close()
 
-import csv
+async def scrape_artist(scraper, username, args, limit):
+    """
+    Searches one artist's media tweets, downloads their media and saves the run.
+
+    Returns:
+        (number of tweets scraped, run output directory)
+    """
+    from downloader import download_media
+    from media_normalizer import prepare_media_downloads
+    from records import write_tweets
+    from stats_store import record_run
+
+    print(f"Scraping tweets for user: {username}")
+
+    query_parts = [
+        f"from:{username}",
+        "filter:media",
+        "-filter:retweets"
+    ]
+    if args.min_likes > 0:
+        query_parts.append(f"min_faves:{args.min_likes}")
+    if args.since:
+        query_parts.append(f"since:{args.since}")
+    if args.until:
+        query_parts.append(f"until:{args.until}")
+    
+    search_query = " ".join(query_parts)
+    encoded_query = quote(search_query)
+    search_url = f"{config.X_BASE_URL}/search?q={encoded_query}&src=typed_query&f=live"
+    
+    print(f"Constructed search URL: {search_url}")
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_output_dir = os.path.join(args.output_dir, f"{username}_{timestamp}")
+
+    if not os.path.exists(run_output_dir):
+        os.makedirs(run_output_dir)
+    
+    jsonl_output_path = os.path.join(run_output_dir, "tweets.jsonl")
+    media_output_path = os.path.join(run_output_dir, "media")
+
+    collected_tweets = scraper.scrape_from_search(
+        search_url=search_url,
+        limit=limit
+    )
+
+    print(f"Scraped {len(collected_tweets)} tweets for {username}. Starting media download...")
+    
+    all_media_urls = await prepare_media_downloads(collected_tweets)
+
+    downloaded_media_paths = await download_media(all_media_urls, media_output_path)
+
+    download_map = {url: path for url, path in downloaded_media_paths}
+    
+    for tweet in collected_tweets:
+        tweet.media_local_paths = [download_map.get(url, url) for url in tweet.media_urls]
+    write_tweets(jsonl_output_path, collected_tweets)
+
+    record_run(collected_tweets, jsonl_output_path)
+    
+    print(f"Scraping for {username} complete. Data saved to {jsonl_output_path}")
+    print(f"Downloaded media to {media_output_path}")
+    return len(collected_tweets), run_output_dir
+
+def seed_artist_queue(queue, usernames, args):
+    """
+    Seeds a user_scrape queue with artists. A round that stopped at its
+    --max-tweets budget counts as over, so the next seed re-opens every artist
+    with a fresh budget even though some were left pending.
+
+    Returns:
+        The number of artists added or re-opened.
+    """
+    budgets = {"tweets": args.max_tweets} if args.max_tweets is not None else None
+    return queue.seed([(username.lower(), {"username": username}) for username in usernames], budgets)
+
+async def scrape_artists_from_queue(scraper, queue, args):
+    """
+    Scrapes artists leased from a shared job queue until it is drained.
+
+    --max-tweets is enforced across every worker of the queue: each artist's
+    limit is reserved from a shared "tweets" counter before searching and the
+    unused part is handed back afterwards. A reservation is capped at
+    --max-artist-tweets, or config.JOB_TWEET_CHUNK, so one worker cannot hold
+    the whole budget. When the budget is used up, the job is deferred until
+    other workers hand back what they did not use.
+    """
+    from job_queue import JobDeferred, work_queue
+
+    async def scrape_job(lease):
+        limit = args.max_artist_tweets
+        if args.max_tweets is not None:
+            limit = queue.reserve("tweets", limit or config.JOB_TWEET_CHUNK, args.max_tweets)
+            if limit == 0:
+                raise JobDeferred("Global tweet limit reached.")
+
+        tweet_count = 0
+        try:
+            tweet_count, run_output_dir = await scrape_artist(scraper, lease.payload["username"], args, limit)
+        finally:
+            if args.max_tweets is not None:
+                queue.add_to_counter("tweets", tweet_count - limit)
+        return {"username": lease.payload["username"], "tweets": tweet_count, "run_dir": run_output_dir}
+
+    completed = await work_queue(queue, scrape_job, lease_seconds=args.lease_seconds)
+    print(f"This worker scraped {completed} artists from queue '{queue.name}'.")
 
 async def run_user_scraper(args):
     """Runs the user-specific media scraper."""
-    if not args.username and not args.input_csv:
-        print("Error: Either --username or --input-csv must be provided.")
+    from scraper import XScraper
+    from scheduler import plan_refresh
+
+    if not args.username and not args.input_csv and not args.queue:
+        print("Error: Either --username, --input-csv or --queue must be provided.")
         return
 
     usernames = []
@@ -72,16 +203,26 @@ async def run_user_scraper(args):
         usernames.append(args.username)
     elif args.input_csv:
         try:
-            with open(args.input_csv, 'r', newline='', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile)
-                next(reader)  # Skip header
-                for row in reader:
-                    if row:
-                        usernames.append(row[1].lstrip('@'))
+            usernames = read_usernames(args.input_csv)
         except FileNotFoundError:
             print(f"Error: Input CSV file not found at {args.input_csv}")
             return
 
+    if args.schedule and usernames:
+        schedules = plan_refresh(usernames, args.output_dir, max_searches=args.max_searches,
+                                 max_minutes=args.max_minutes, limit=args.max_artist_tweets)
+        usernames = [artist.username for artist in schedules if artist.selected]
+        print(f"Scheduler selected {len(usernames)} of {len(schedules)} artists for this run.")
+
+    queue = None
+    if args.queue:
+        from job_queue import open_job_queue
+
+        queue = open_job_queue(args.queue, args.queue_name)
+        if usernames:
+            added = seed_artist_queue(queue, usernames, args)
+            print(f"Added {added} of {len(usernames)} artists to queue '{args.queue_name}'.")
+
     total_tweets_scraped = 0
     scraper = None
     try:
@@ -92,40 +233,15 @@ async def run_user_scraper(args):
         
         print("Login successful. Starting to scrape...")
 
+        if queue:
+            await scrape_artists_from_queue(scraper, queue, args)
+            return
+
         for username in usernames:
             if args.max_tweets is not None and total_tweets_scraped >= args.max_tweets:
                 print("Global tweet limit reached. Stopping.")
                 break
 
-            print(f"Scraping tweets for user: {username}")
-
-            query_parts = [
-                f"from:{username}",
-                "filter:media",
-                "-filter:retweets"
-            ]
-            if args.min_likes > 0:
-                query_parts.append(f"min_faves:{args.min_likes}")
-            if args.since:
-                query_parts.append(f"since:{args.since}")
-            if args.until:
-                query_parts.append(f"until:{args.until}")
-            
-            search_query = " ".join(query_parts)
-            encoded_query = quote(search_query)
-            search_url = f"https://x.com/search?q={encoded_query}&src=typed_query&f=live"
-            
-            print(f"Constructed search URL: {search_url}")
-
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            run_output_dir = os.path.join(args.output_dir, f"{username}_{timestamp}")
-
-            if not os.path.exists(run_output_dir):
-                os.makedirs(run_output_dir)
-            
-            jsonl_output_path = os.path.join(run_output_dir, "tweets.jsonl")
-            media_output_path = os.path.join(run_output_dir, "media")
-
             limit_per_artist = args.max_artist_tweets
             if args.max_tweets is not None:
                 remaining_global_limit = args.max_tweets - total_tweets_scraped
@@ -133,33 +249,9 @@ async def run_user_scraper(args):
                     limit_per_artist = remaining_global_limit
                 else:
                     limit_per_artist = min(limit_per_artist, remaining_global_limit)
-            
-            collected_tweets = scraper.scrape_from_search(
-                search_url=search_url,
-                limit=limit_per_artist
-            )
 
-            total_tweets_scraped += len(collected_tweets)
-            print(f"Scraped {len(collected_tweets)} tweets for {username}. Starting media download...")
-            
-            all_media_urls = []
-            for tweet in collected_tweets:
-                all_media_urls.extend(tweet["media_urls"])
-
-            downloaded_media_paths = await download_media(all_media_urls, media_output_path)
-
-            download_map = {url: path for url, path in downloaded_media_paths}
-            
-            with open(jsonl_output_path, "w", encoding="utf-8") as f:
-                for tweet in collected_tweets:
-                    local_media_paths = []
-                    for original_url in tweet["media_urls"]:
-                        local_media_paths.append(download_map.get(original_url, original_url))
-                    tweet["media_local_paths"] = local_media_paths
-                    f.write(json.dumps(tweet, ensure_ascii=False) + "\n")
-            
-            print(f"Scraping for {username} complete. Data saved to {jsonl_output_path}")
-            print(f"Downloaded media to {media_output_path}")
+            tweet_count, _ = await scrape_artist(scraper, username, args, limit_per_artist)
+            total_tweets_scraped += tweet_count
 
     finally:
         if scraper:
@@ -167,19 +259,71 @@ async def run_user_scraper(args):
 
 async def run_curator(args):
     """Runs the artist curator."""
+    from scraper import XScraper
+    from curator import artist_job, curate_from_queue, curate_recursively
+    from follow_graph import FollowGraph
+
+    if not args.artist_url and not args.queue:
+        print("Error: Either artist_url or --queue must be provided.")
+        return
+
+    queue = None
+    if args.queue:
+        from job_queue import open_job_queue
+
+        queue = open_job_queue(args.queue, args.queue_name)
+        if args.artist_url:
+            queue.seed([artist_job(args.artist_url, args.depth)])
+
     scraper = None
     try:
         scraper = XScraper(headless=args.headless)
         if scraper.login():
             print("Login successful. Starting curation...")
-            await curate_recursively(scraper.driver, args.artist_url, args.depth)
+            graph = FollowGraph(args.graph_file)
+            if queue:
+                completed = await curate_from_queue(scraper.driver, queue, args.lease_seconds, graph=graph)
+                print(f"This worker curated {completed} artists from queue '{queue.name}'.")
+            else:
+                await curate_recursively(scraper.driver, args.artist_url, args.depth, graph=graph)
+            print(f"Follow graph now has {graph.node_count} accounts and {graph.edge_count} edges.")
         else:
             print("Login failed. Exiting.")
     finally:
         if scraper:
             scraper.close()
 
-async def main():
+def add_stat_filter_arguments(subparser):
+    """Adds the --min-* stat threshold arguments shared by select and search."""
+    subparser.add_argument("--min-replies", type=int, default=0,
+                           help="Minimum number of replies.")
+    subparser.add_argument("--min-reposts", type=int, default=0,
+                           help="Minimum number of reposts.")
+    subparser.add_argument("--min-likes", type=int, default=0,
+                           help="Minimum number of likes.")
+    subparser.add_argument("--min-bookmarks", type=int, default=0,
+                           help="Minimum number of bookmarks.")
+    subparser.add_argument("--min-views", type=int, default=0,
+                           help="Minimum number of views.")
+
+def add_schedule_budget_arguments(subparser):
+    """Adds the refresh scheduler budget arguments shared by user_scrape and plan."""
+    subparser.add_argument("--max-searches", type=int, default=None,
+                           help="Maximum number of artist searches the scheduler may pick.")
+    subparser.add_argument("--max-minutes", type=float, default=None,
+                           help="Estimated time budget in minutes for the scheduler's picks.")
+
+def add_job_queue_arguments(subparser, default_name):
+    """Adds the shared job queue arguments used by user_scrape and curate."""
+    subparser.add_argument("--queue", type=str, default=None,
+                           help="Share work with other boxes through a job queue: a SQLite file path "
+                                "or a redis:// URL. Boxes started with only --queue join as workers.")
+    subparser.add_argument("--queue-name", type=str, default=default_name,
+                           help="Name of the job queue to seed and work on.")
+    subparser.add_argument("--lease-seconds", type=float, default=config.JOB_LEASE_SECONDS,
+                           help="How long a leased job may go without a heartbeat before it is requeued.")
+
+def main():
     parser = argparse.ArgumentParser(description="Scrape X (Twitter).")
     parser.add_argument("--headless", action="store_true",
                         help="Run the browser in headless mode (without a UI).")
@@ -197,8 +341,27 @@ async def main():
 
     # Curator command
     parser_curate = subparsers.add_parser("curate", help="Curate artists by scraping their followed list.")
-    parser_curate.add_argument("artist_url", type=str, help="The URL of the artist's profile to curate.")
+    parser_curate.add_argument("artist_url", type=str, nargs="?", default=None,
+                               help="The URL of the artist's profile to curate. Optional with --queue.")
     parser_curate.add_argument("--depth", type=int, default=1, help="The recursion depth for curating artists.")
+    parser_curate.add_argument("--graph-file", type=str, default=config.FOLLOW_GRAPH_FILE,
+                               help="Path to the follow graph the curator records edges into.")
+    add_job_queue_arguments(parser_curate, "curate")
+
+    # Rank command
+    parser_rank = subparsers.add_parser("rank", help="Rank accounts in the follow graph as curation candidates.")
+    parser_rank.add_argument("--graph-file", type=str, default=config.FOLLOW_GRAPH_FILE,
+                             help="Path to the follow graph recorded by curate.")
+    parser_rank.add_argument("--seed-csv", type=str, default=CURATED_ARTISTS_FILE,
+                             help="CSV of curated artists to seed the ranking from.")
+    parser_rank.add_argument("--method", type=str, default="pagerank", choices=["pagerank", "cofollow"],
+                             help="Scoring method. Options: pagerank (personalized), cofollow (seed follower count).")
+    parser_rank.add_argument("--top", type=int, default=50,
+                             help="Number of candidates to show.")
+    parser_rank.add_argument("--include-seeds", action="store_true",
+                             help="Include seed artists in the ranking.")
+    parser_rank.add_argument("--output-csv", type=str, default=None,
+                             help="Optionally save the ranked candidates as a CSV usable with user_scrape --input-csv.")
 
     # Selector command
     parser_select = subparsers.add_parser("select", help="Select and filter tweets from a directory.")
@@ -206,20 +369,55 @@ async def main():
                                help="Path to the directory containing tweets.jsonl and media folder.")
     parser_select.add_argument("--output-dir", type=str, required=True,
                                help="Path to the directory where the selected data will be saved.")
-    parser_select.add_argument("--min-replies", type=int, default=0,
-                               help="Minimum number of replies.")
-    parser_select.add_argument("--min-reposts", type=int, default=0,
-                               help="Minimum number of reposts.")
-    parser_select.add_argument("--min-likes", type=int, default=0,
-                               help="Minimum number of likes.")
-    parser_select.add_argument("--min-bookmarks", type=int, default=0,
-                               help="Minimum number of bookmarks.")
-    parser_select.add_argument("--min-views", type=int, default=0,
-                               help="Minimum number of views.")
-    parser_select.add_argument("--sort-by", type=str, default="views", choices=["likes", "views"],
-                               help="How to sort the output tweets.jsonl. Options: likes, views.")
+    add_stat_filter_arguments(parser_select)
+    parser_select.add_argument("--sort-by", type=str, default="views", choices=["likes", "views", *TREND_SORT_KEYS],
+                               help="How to sort the output tweets.jsonl. Options: likes, views, "
+                                    "likes_24h, views_24h (gained in the last 24h), "
+                                    "likes_growth, views_growth (per hour, from the stats store).")
+    parser_select.add_argument("--stats-store", type=str, default=config.STATS_STORE_FILE,
+                               help="Path to the stats time-series store used by the trend sort keys.")
     parser_select.add_argument("--action", type=str, default="copy", choices=["copy", "move"],
                                help="Whether to copy or move media files. Options: copy, move.")
+    parser_select.add_argument("--max-hash-distance", type=int, default=None,
+                               help="Skip media within this perceptual-hash distance of an already selected image.")
+
+    # Dedupe command
+    parser_dedupe = subparsers.add_parser("dedupe", help="Find near-duplicate images across scraped runs.")
+    parser_dedupe.add_argument("--data-root", type=str, default="data",
+                               help="Base directory containing the scraped run directories.")
+    parser_dedupe.add_argument("--index-file", type=str, default=config.MEDIA_INDEX_FILE,
+                               help="Path to the persistent perceptual-hash index.")
+    parser_dedupe.add_argument("--max-distance", type=int, default=6,
+                               help="Maximum Hamming distance (out of 64 bits) between near-duplicates.")
+    parser_dedupe.add_argument("--workers", type=int, default=None,
+                               help="Number of hashing processes. Defaults to the CPU count.")
+    parser_dedupe.add_argument("--action", type=str, default="report", choices=["report", "move"],
+                               help="Whether to only report duplicates or move them out. Options: report, move.")
+    parser_dedupe.add_argument("--output-dir", type=str, default="data/duplicates",
+                               help="Where duplicates are moved when --action is move.")
+
+    # Stats ingest command
+    parser_stats = subparsers.add_parser("stats_ingest", help="Backfill the stats time-series store from scraped runs.")
+    parser_stats.add_argument("--data-root", type=str, default="data",
+                              help="Base directory containing the scraped run directories.")
+    parser_stats.add_argument("--store-file", type=str, default=config.STATS_STORE_FILE,
+                              help="Path to the stats time-series store.")
+
+    # Search command
+    parser_search = subparsers.add_parser("search", help="Full-text search over all scraped tweets.")
+    parser_search.add_argument("query", type=str,
+                               help="Search terms. Use #tag for hashtags and @handle for authors.")
+    parser_search.add_argument("--data-root", type=str, default="data",
+                               help="Base directory containing the scraped run directories.")
+    parser_search.add_argument("--index-file", type=str, default=config.SEARCH_INDEX_FILE,
+                               help="Path to the SQLite search index.")
+    add_stat_filter_arguments(parser_search)
+    parser_search.add_argument("--sort-by", type=str, default="rank", choices=list(SORT_COLUMNS),
+                               help="How to order results. Options: rank, likes, views, recent.")
+    parser_search.add_argument("--limit", type=int, default=20,
+                               help="Maximum number of results.")
+    parser_search.add_argument("--json", action="store_true",
+                               help="Print matching tweets as JSON lines.")
 
     # User Scraper command
     parser_user_scrape = subparsers.add_parser("user_scrape", help="Scrape media tweets from a specific user or a list of users.")
@@ -239,21 +437,49 @@ async def main():
                                     help="End date for scraping (YYYY-MM-DD).")
     parser_user_scrape.add_argument("--output-dir", type=str, default="data",
                                help="Base directory to save scraped data and media.")
+    parser_user_scrape.add_argument("--schedule", action="store_true",
+                                    help="Only scrape artists the refresh scheduler considers due, most productive first.")
+    add_schedule_budget_arguments(parser_user_scrape)
+    add_job_queue_arguments(parser_user_scrape, "user_scrape")
+
+    # Jobs command
+    parser_jobs = subparsers.add_parser("jobs", help="Show or manage a shared user_scrape/curate job queue.")
+    parser_jobs.add_argument("queue", type=str,
+                             help="The job queue: a SQLite file path or a redis:// URL.")
+    parser_jobs.add_argument("--name", type=str, default="user_scrape",
+                             help="Name of the queue, e.g. user_scrape or curate.")
+    parser_jobs.add_argument("--requeue-failed", action="store_true",
+                             help="Move failed jobs back to pending.")
+    parser_jobs.add_argument("--reset", action="store_true",
+                             help="Delete every job and counter of the queue, e.g. to start a new round.")
+    parser_jobs.add_argument("--merge-graph", type=str, default=None,
+                             help="Merge follow edges reported by completed curate jobs into this follow graph.")
+    parser_jobs.add_argument("--merge-artists", type=str, default=None,
+                             help="Append new artists reported by completed curate jobs to this CSV.")
+
+    # Plan command
+    parser_plan = subparsers.add_parser("plan", help="Dry-run the refresh scheduler for user_scrape --schedule.")
+    parser_plan.add_argument("--input-csv", type=str, required=True,
+                             help="Path to a CSV file containing a list of artist handles.")
+    parser_plan.add_argument("--max-artist-tweets", type=int, default=None,
+                             help="Maximum number of recent tweets to scrape per artist.")
+    parser_plan.add_argument("--output-dir", type=str, default="data",
+                             help="Base directory containing previous user_scrape runs.")
+    add_schedule_budget_arguments(parser_plan)
 
     args = parser.parse_args()
 
     try:
-        if args.command == "scrape":
-            await run_scraper(args)
-        elif args.command == "curate":
-            await run_curator(args)
-        elif args.command == "select":
-            await run_selector(args)
-        elif args.command == "user_scrape":
-            await run_user_scraper(args)
+        result = resolve_command(args.command)(args)
+        # Only the browser and queue commands are coroutines; the offline
+        # commands are plain functions, so they never pay for importing asyncio.
+        if hasattr(result, "__await__"):
+            import asyncio
+
+            asyncio.run(result)
     except Exception:
         print(f"An error occurred:")
         traceback.print_exc()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,335 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import codec
+from config import config
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
+DHASH_SIZE = 8
+# Media folders written by select (selector.py), which hold copies, not originals.
+COPY_DIR_NAMES = {"selected"}
+# Most candidate pairs near_duplicate_pairs compares at once, bounding its
+# memory when many hashes share a band value (e.g. flat or white images).
+PAIR_BLOCK_SIZE = 1 << 22
+
+def dhash(image_path: str, hash_size: int = DHASH_SIZE) -> Optional[int]:
+    """
+    Computes the difference hash (dHash) of an image as a hash_size**2-bit int.
+
+    Returns None if the file cannot be read as an image.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(image_path) as image:
+            pixels = list(image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS).getdata())
+    except Exception as e:
+        print(f"Could not hash {image_path}: {e}")
+        return None
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+class BKTree:
+    """
+    A Burkhard-Keller tree over integer hashes with Hamming distance as the metric.
+
+    Each node is [hash, items, children], where children maps distance -> node.
+    """
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, hash_value: int, item):
+        self.size += 1
+        if self.root is None:
+            self.root = [hash_value, [item], {}]
+            return
+
+        node = self.root
+        while True:
+            distance = hamming_distance(hash_value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [hash_value, [item], {}]
+                return
+            node = child
+
+    def search(self, hash_value: int, max_distance: int) -> List[Tuple[int, object]]:
+        """Returns (distance, item) pairs for every item within max_distance of hash_value."""
+        results = []
+        if self.root is None:
+            return results
+
+        stack = [self.root]
+        while stack:
+            node_hash, items, children = stack.pop()
+            distance = hamming_distance(hash_value, node_hash)
+            if distance <= max_distance:
+                results.extend((distance, item) for item in items)
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in children.items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+        return results
+
+def _hash_entry(path: str) -> Tuple[str, Optional[int]]:
+    return path, dhash(path)
+
+def find_images(root_dir: str, exclude_dirs: Iterable[str] = ()) -> List[str]:
+    """
+    Walks root_dir and returns the absolute paths of all image files under it.
+
+    Directories in exclude_dirs and select's output media folders are skipped,
+    since they only hold copies of images that live in a run directory.
+    """
+    excluded = {os.path.abspath(d) for d in exclude_dirs}
+    image_paths = []
+    for dir_path, dir_names, file_names in os.walk(root_dir):
+        dir_names[:] = [name for name in dir_names if name not in COPY_DIR_NAMES
+                        and os.path.abspath(os.path.join(dir_path, name)) not in excluded]
+        for file_name in file_names:
+            if os.path.splitext(file_name)[1].lower() in IMAGE_EXTENSIONS:
+                image_paths.append(os.path.abspath(os.path.join(dir_path, file_name)))
+    return image_paths
+
+class MediaIndex:
+    """
+    A persistent perceptual-hash index of downloaded images.
+
+    Entries are stored one per line in a JSONL file keyed by absolute path, along
+    with the file's size and mtime so unchanged files are never re-hashed.
+    """
+    def __init__(self, index_file: str = config.MEDIA_INDEX_FILE):
+        self.index_file = index_file
+        self.entries: Dict[str, dict] = {}
+        self._tree = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_file):
+            return
+        for entry in codec.iter_jsonl(self.index_file):
+            try:
+                self.entries[entry["path"]] = entry
+            except (KeyError, TypeError):
+                print(f"Skipping invalid line in {self.index_file}")
+
+    def _save(self):
+        index_dir = os.path.dirname(self.index_file)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+        tmp_path = f"{self.index_file}.tmp"
+        codec.write_jsonl(tmp_path, self.entries.values())
+        os.replace(tmp_path, self.index_file)
+
+    def update(self, image_paths: List[str], workers: Optional[int] = None) -> int:
+        """
+        Hashes any new or modified images in a process pool and persists the index.
+
+        Entries for files that no longer exist are dropped.
+
+        Returns:
+            The number of images that were (re)hashed.
+        """
+        stale = [path for path in self.entries if not os.path.exists(path)]
+        for path in stale:
+            del self.entries[path]
+
+        pending = {}
+        for path in image_paths:
+            path = os.path.abspath(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = self.entries.get(path)
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                continue
+            pending[path] = stat
+
+        if pending:
+            print(f"Hashing {len(pending)} new or modified images...")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for path, hash_value in executor.map(_hash_entry, pending, chunksize=64):
+                    if hash_value is None:
+                        continue
+                    stat = pending[path]
+                    self.entries[path] = {
+                        "path": path,
+                        "hash": f"{hash_value:016x}",
+                        "size": stat.st_size,
+                        "mtime": stat.st_mtime,
+                    }
+
+        if pending or stale:
+            self._tree = None
+            self._save()
+        return len(pending)
+
+    def get_hash(self, path: str) -> Optional[int]:
+        entry = self.entries.get(os.path.abspath(path))
+        return int(entry["hash"], 16) if entry else None
+
+    @property
+    def tree(self) -> BKTree:
+        if self._tree is None:
+            self._tree = BKTree()
+            for path, entry in self.entries.items():
+                self._tree.add(int(entry["hash"], 16), path)
+        return self._tree
+
+    def find_similar(self, path: str, max_distance: int) -> List[Tuple[int, str]]:
+        """Returns (distance, path) pairs for indexed images near the given indexed image."""
+        hash_value = self.get_hash(path)
+        if hash_value is None:
+            return []
+        return sorted(self.tree.search(hash_value, max_distance))
+
+    def find_duplicate_groups(self, max_distance: int, paths: Optional[List[str]] = None) -> List[List[str]]:
+        """
+        Clusters indexed images into near-duplicate groups.
+
+        The largest file of each group comes first and is the one to keep.
+        Groups of a single image are omitted.
+
+        Args:
+            max_distance: The maximum Hamming distance between two duplicates.
+            paths: Restricts grouping to these images. Defaults to the whole index.
+        """
+        if paths is None:
+            candidates = list(self.entries)
+        else:
+            candidates = list(dict.fromkeys(os.path.abspath(p) for p in paths if os.path.abspath(p) in self.entries))
+
+        # Images with identical hashes share one node; neighbors are found per distinct hash.
+        paths_by_hash: Dict[int, List[str]] = {}
+        for path in candidates:
+            paths_by_hash.setdefault(int(self.entries[path]["hash"], 16), []).append(path)
+        hashes = list(paths_by_hash)
+        neighbors: Dict[int, List[Tuple[int, int]]] = {h: [(0, h)] for h in hashes}
+        for i, j, distance in near_duplicate_pairs(hashes, max_distance):
+            neighbors[hashes[i]].append((distance, hashes[j]))
+            neighbors[hashes[j]].append((distance, hashes[i]))
+
+        candidates.sort(key=lambda p: (-self.entries[p]["size"], p))
+        assigned = set()
+        groups = []
+        for path in candidates:
+            if path in assigned:
+                continue
+            assigned.add(path)
+            group = [path]
+            nearby = sorted((distance, other) for distance, other_hash in neighbors[int(self.entries[path]["hash"], 16)]
+                            for other in paths_by_hash[other_hash])
+            for _, other in nearby:
+                if other not in assigned:
+                    assigned.add(other)
+                    group.append(other)
+            if len(group) > 1:
+                groups.append(group)
+        return groups
+
+def near_duplicate_pairs(hashes: List[int], max_distance: int, bits: int = DHASH_SIZE ** 2):
+    """
+    Finds every pair of distinct hashes within max_distance bits of each other.
+
+    Uses multi-index hashing: split into max_distance + 1 bands, any two hashes
+    that close agree exactly on at least one band (pigeonhole). Hashes sharing a
+    band value form a bucket whose pairs are verified with a vectorized popcount,
+    one bucket (or block of a large bucket) at a time. This avoids the
+    all-pairs comparison a BK-tree degrades to at radius 6 over 64-bit hashes.
+
+    Returns:
+        (i, j, distance) tuples of indexes into hashes, with i < j.
+    """
+    import numpy as np
+
+    if len(hashes) < 2:
+        return []
+    values = np.array(hashes, dtype=np.uint64)
+    band_count = min(max_distance + 1, bits)
+    bounds = np.linspace(0, bits, band_count + 1).astype(int)
+
+    close_pairs = []
+    for low, high in zip(bounds[:-1], bounds[1:]):
+        band = (values >> np.uint64(low)) & np.uint64((1 << (high - low)) - 1)
+        order = np.argsort(band, kind="stable")
+        sorted_band = band[order]
+        starts = np.flatnonzero(np.r_[True, sorted_band[1:] != sorted_band[:-1]])
+        sizes = np.diff(np.r_[starts, len(order)])
+        for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+            close_pairs.extend(_close_pairs_in_bucket(values, np.sort(order[start:start + size]), max_distance))
+    if not close_pairs:
+        return []
+
+    # Pairs agreeing on several bands were found once per band.
+    first, second = np.divmod(np.unique(np.concatenate(close_pairs)), len(hashes))
+    distances = np.bitwise_count(values[first] ^ values[second])
+    return list(zip(first.tolist(), second.tolist(), distances.tolist()))
+
+def _close_pairs_in_bucket(values, members, max_distance):
+    """
+    Compares every pair of one bucket's sorted members in blocks of rows, so no
+    more than PAIR_BLOCK_SIZE distances exist at once.
+
+    Returns:
+        Arrays of i * len(values) + j for the close pairs (i < j).
+    """
+    import numpy as np
+
+    bucket = values[members]
+    rows = max(1, PAIR_BLOCK_SIZE // len(members))
+    found = []
+    for top in range(0, len(members) - 1, rows):
+        bottom = min(top + rows, len(members) - 1)
+        distances = np.bitwise_count(bucket[top:bottom, None] ^ bucket[None, top + 1:])
+        row, column = np.nonzero(distances <= max_distance)
+        i, j = top + row, top + 1 + column
+        keep = i < j
+        if keep.any():
+            found.append(members[i[keep]].astype(np.int64) * len(values) + members[j[keep]])
+    return found
+
+def run_dedupe(args):
+    """Indexes all images under a data root and collapses near-duplicates."""
+    if not os.path.isdir(args.data_root):
+        print(f"Error: {args.data_root} not found.")
+        return
+
+    index = MediaIndex(args.index_file)
+    # Moved duplicates must not be indexed (and possibly kept) on the next run.
+    image_paths = find_images(args.data_root, exclude_dirs=[args.output_dir])
+    index.update(image_paths, workers=args.workers)
+    print(f"Indexed {len(image_paths)} images under {args.data_root}.")
+
+    groups = index.find_duplicate_groups(args.max_distance, image_paths)
+    duplicate_count = sum(len(group) - 1 for group in groups)
+    print(f"Found {len(groups)} near-duplicate groups ({duplicate_count} redundant images).")
+
+    for group in groups:
+        keep, duplicates = group[0], group[1:]
+        print(f"Keeping {keep}")
+        for duplicate in duplicates:
+            print(f"  - duplicate: {duplicate}")
+            if args.action == "move":
+                # Copies of one media ID share a file name, so keep the run-relative path.
+                dest_path = os.path.join(args.output_dir, os.path.relpath(duplicate, os.path.abspath(args.data_root)))
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                shutil.move(duplicate, dest_path)
+
+    if args.action == "move" and duplicate_count:
+        index.update([])
+        print(f"Moved {duplicate_count} duplicates to {args.output_dir}")
@@ -0,0 +1,164 @@
+import os
+import aiohttp
+import asyncio
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+from config import config
+
+# Named size variants served by pbs.twimg.com, largest first.
+MEDIA_SIZE_VARIANTS = ["orig", "large", "medium", "small", "thumb"]
+MEDIA_HOSTS = ("pbs.twimg.com", urlparse(config.MEDIA_BASE_URL).netloc)
+
+def parse_media_url(url: str) -> Optional[Dict[str, str]]:
+    """
+    Splits a pbs.twimg.com media URL into its media ID, format and size variant.
+
+    Handles both the query style (`/media/ID?format=jpg&name=small`) and the
+    legacy extension style (`/media/ID.jpg:large`).
+
+    Returns:
+        A dict with "media_id", "base", "format" and "size", or None if the URL
+        is not a recognised image URL (e.g. video blobs), in which case it should
+        be downloaded as-is.
+    """
+    parsed = urlparse(url)
+    if parsed.netloc not in MEDIA_HOSTS:
+        return None
+
+    path = parsed.path
+    legacy_size = None
+    if ":" in os.path.basename(path):
+        path, legacy_size = path.rsplit(":", 1)
+
+    stem, path_ext = os.path.splitext(path)
+    media_id = os.path.basename(stem)
+    if not media_id:
+        return None
+
+    query = parse_qs(parsed.query)
+    media_format = query.get("format", [path_ext.lstrip(".") or "jpg"])[0]
+    size = query.get("name", [legacy_size or "medium"])[0]
+
+    return {
+        "media_id": media_id,
+        "base": f"{parsed.scheme}://{parsed.netloc}{stem}",
+        "format": media_format,
+        "size": size,
+    }
+
+def build_media_url(media: Dict[str, str], size: str) -> str:
+    """Rebuilds a media URL from parse_media_url() output at the given size variant."""
+    return f"{media['base']}?format={media['format']}&name={size}"
+
+def canonicalize_media_url(url: str, target=None) -> str:
+    """
+    Rewrites a media URL to the configured target size variant.
+
+    A byte budget (int) resolves to "orig" here; fit_to_byte_budget() steps it
+    down afterwards, once per unique media ID.
+    """
+    target = config.MEDIA_TARGET_SIZE if target is None else target
+    media = parse_media_url(url)
+    if media is None:
+        return url
+    size = target if isinstance(target, str) else "orig"
+    return build_media_url(media, size)
+
+def media_key(url: str) -> str:
+    """Returns the dedupe key for a media URL: its media ID, or the URL itself if unparsable."""
+    media = parse_media_url(url)
+    return media["media_id"] if media else url
+
+def normalize_tweet_media(tweets: List[dict], target=None) -> List[str]:
+    """
+    Canonicalizes every tweet's media_urls in place and dedupes them by media ID.
+
+    Args:
+        tweets: Tweets as returned by XScraper; their "media_urls" are rewritten.
+        target: "orig", "large", "medium", "small" or a byte budget (int).
+            Defaults to config.MEDIA_TARGET_SIZE.
+
+    Returns:
+        The unique canonical URLs to download, in first-seen order.
+    """
+    kept_urls = {}
+    unique_urls = []
+    duplicates = 0
+
+    for tweet in tweets:
+        canonical_urls = []
+        for url in tweet.get("media_urls", []):
+            canonical_url = canonicalize_media_url(url, target)
+            key = media_key(canonical_url)
+            if key in kept_urls:
+                # Point every variant at the one URL that will be downloaded.
+                canonical_url = kept_urls[key]
+                duplicates += 1
+            else:
+                kept_urls[key] = canonical_url
+                unique_urls.append(canonical_url)
+
+            if canonical_url not in canonical_urls:
+                canonical_urls.append(canonical_url)
+        tweet["media_urls"] = canonical_urls
+
+    if duplicates:
+        print(f"Skipped {duplicates} duplicate media variants.")
+    return unique_urls
+
+async def fit_to_byte_budget(media_urls: List[str], byte_budget: int) -> Dict[str, str]:
+    """
+    Picks the largest size variant of each media URL that fits within byte_budget.
+
+    Issues HEAD requests only, largest variant first, and steps down only while
+    a variant is known to be too large. If a size cannot be determined (request
+    error, non-200 status, missing or malformed Content-Length), the input URL
+    is kept rather than guessing smaller. If every variant is too large, the
+    smallest one is used.
+
+    Returns:
+        A dict mapping each input URL to the URL that should be downloaded.
+    """
+    async def _fit(session, url: str):
+        media = parse_media_url(url)
+        if media is None:
+            return url, url
+        for size in MEDIA_SIZE_VARIANTS:
+            candidate = build_media_url(media, size)
+            try:
+                async with session.head(candidate) as response:
+                    length = response.headers.get("Content-Length", "")
+                    if response.status != 200 or not length.isdigit():
+                        print(f"Could not determine size of {candidate} (HTTP {response.status}); keeping {url}")
+                        return url, url
+                    if int(length) <= byte_budget:
+                        return url, candidate
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Error checking size of {candidate}: {e}; keeping {url}")
+                return url, url
+        return url, build_media_url(media, MEDIA_SIZE_VARIANTS[-1])
+
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(*[_fit(session, url) for url in media_urls])
+    return dict(results)
+
+async def prepare_media_downloads(tweets: List[dict], target=None) -> List[str]:
+    """
+    Normalizes and dedupes the media of scraped tweets ahead of download_media().
+
+    Tweets' "media_urls" are rewritten to the exact URLs that will be fetched,
+    so they can be matched against download_media() results.
+
+    Returns:
+        The unique URLs to download.
+    """
+    target = config.MEDIA_TARGET_SIZE if target is None else target
+    media_urls = normalize_tweet_media(tweets, target)
+    if isinstance(target, str):
+        return media_urls
+
+    fitted = await fit_to_byte_budget(media_urls, target)
+    for tweet in tweets:
+        tweet["media_urls"] = [fitted.get(url, url) for url in tweet["media_urls"]]
+    return [fitted[url] for url in media_urls]
@@ -0,0 +1,286 @@
+import os
+import re
+import html
+import random
+import asyncio
+import argparse
+import datetime
+from dataclasses import dataclass
+from urllib.parse import parse_qs, quote
+
+from aiohttp import web
+
+FIXTURE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Identifiers baked into the captured fixtures, replaced per synthetic record.
+TWEET_FIXTURE = "TweetPictureWithVideoSample.html"
+TWEET_FIXTURE_HANDLE = "mavros_15rs"
+TWEET_FIXTURE_ID = "2002731744961925516"
+TWEET_FIXTURE_TIME = "2025-12-21T13:23:51.000Z"
+TWEET_FIXTURE_STATS = "35 reposts, 758 likes, 226 bookmarks, 31885 views"
+STATS_FIXTURE = "TweetSample.html"
+FOLLOWING_FIXTURE = "FollowedListUserSample.html"
+FOLLOWING_FIXTURE_HANDLE = "ebi_tanisi"
+FOLLOWING_FIXTURE_NAME = "潮崎いせ"
+FOLLOWING_FIXTURE_ID = "1189480821440176129"
+PROFILE_FIXTURE = "FollowedListTargetUserSample.html"
+PROFILE_FIXTURE_HANDLE = "ki_15kan"
+PROFILE_FIXTURE_NAME = "飴玉缶太郎"
+RATE_LIMIT_FIXTURE = "RateLimitedSample.html"
+
+# Approximate bytes served for each pbs.twimg.com size variant.
+MEDIA_VARIANT_BYTES = {"thumb": 8_000, "small": 60_000, "medium": 150_000, "large": 350_000, "orig": 700_000}
+VIDEO_BYTES = 2_000_000
+PAGE_SIZE = 10
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>article, [data-testid="cellInnerDiv"] {{ display: block; min-height: 300px; }}</style></head>
+<body><main>{header}<div id="feed">{items}</div></main>
+<script>
+let offset = {next_offset};
+let loading = false;
+let done = {done};
+setInterval(async () => {{
+    if (loading || done) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 400) return;
+    loading = true;
+    try {{
+        const response = await fetch("/_mock/feed?kind={kind}&key={key}&offset=" + offset);
+        if (response.ok) {{
+            const fragment = await response.text();
+            document.getElementById("feed").insertAdjacentHTML("beforeend", fragment);
+            offset = parseInt(response.headers.get("X-Next-Offset"));
+            done = response.headers.get("X-Done") === "1";
+        }}
+    }} finally {{
+        loading = false;
+    }}
+}}, 250);
+</script></body></html>"""
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Log in</title></head><body>
+<div id="step-user"><input name="text" autocomplete="username">
+<button type="button" onclick="document.getElementById('step-user').hidden = true;
+    document.getElementById('step-pass').hidden = false;"><span>Next</span></button></div>
+<div id="step-pass" hidden><input name="password" type="password">
+<button type="button" onclick="window.location = '/home';"><span>Log in</span></button></div>
+</body></html>"""
+
+@dataclass
+class MockSettings:
+    latency_ms: float = 0.0
+    failure_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    search_results: int = 100
+    following_count: int = 200
+    seed: int = 0
+
+def _read_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+class MockX:
+    """
+    A local stand-in for x.com built from the captured HTML fixtures.
+
+    Serves an endless For You timeline, finite search results and following
+    lists (both loaded in pages as the browser scrolls), a login form, the
+    rate-limit banner and media files. Every record is derived from a seeded RNG
+    keyed by (feed, offset), so repeated runs see the same data.
+    """
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self.tweet_template = "<article data-testid=\"tweet\">" + _read_fixture(TWEET_FIXTURE) + "</article>"
+        self.following_template = "<div data-testid=\"cellInnerDiv\">" + _read_fixture(FOLLOWING_FIXTURE) + "</div>"
+        self.profile_template = _read_fixture(PROFILE_FIXTURE)
+        self.rate_limit_html = _read_fixture(RATE_LIMIT_FIXTURE)
+        self.stat_profiles = self._load_stat_profiles()
+        self.media_payload = random.Random(settings.seed).randbytes(max(MEDIA_VARIANT_BYTES["orig"], VIDEO_BYTES))
+        self.fault_rng = random.Random(settings.seed)
+        self.requests = 0
+        self.media_bytes_sent = 0
+
+    def _load_stat_profiles(self):
+        """Takes the stats groups captured in the tweet fixture as the shapes to scale synthetic stats from."""
+        profiles = []
+        for label in re.findall(r'aria-label="([^"]+views)" role="group"', _read_fixture(STATS_FIXTURE)):
+            profiles.append({name: int(count) for count, name in re.findall(r"(\d+) (repl|repost|like|bookmark|view)", label)})
+        return profiles
+
+    def _rng(self, *key):
+        return random.Random(f"{self.settings.seed}:{':'.join(map(str, key))}")
+
+    def _stats_label(self, rng):
+        profile = rng.choice(self.stat_profiles)
+        scale = rng.uniform(0.01, 2.0)
+        stats = {name: int(count * scale) for name, count in profile.items()}
+        return (f"{stats.get('repl', 0)} replies, {stats.get('repost', 0)} reposts, {stats.get('like', 0)} likes, "
+                f"{stats.get('bookmark', 0)} bookmarks, {stats.get('view', 0)} views")
+
+    def render_tweet(self, base_url, feed_key, position, author=None):
+        rng = self._rng("tweet", feed_key, position)
+        handle = author or f"artist_{rng.randrange(5000)}"
+        tweet_id = str(1_900_000_000_000_000_000 + rng.randrange(10 ** 17))
+        posted_at = datetime.datetime(2025, 12, 21, tzinfo=datetime.timezone.utc) - datetime.timedelta(minutes=position * 7)
+        media_id = f"M{tweet_id[-12:]}"
+
+        tweet = self.tweet_template.replace(TWEET_FIXTURE_HANDLE, handle)
+        tweet = tweet.replace(TWEET_FIXTURE_ID, tweet_id)
+        tweet = tweet.replace(TWEET_FIXTURE_TIME, posted_at.strftime("%Y-%m-%dT%H:%M:%S.000Z"))
+        tweet = tweet.replace(TWEET_FIXTURE_STATS, self._stats_label(rng))
+        tweet = re.sub(r'src="https://pbs\.twimg\.com/media/[^"?]+', f'src="{base_url}/media/{media_id}', tweet)
+        tweet = re.sub(r'src="blob:[^"]+"', f'src="{base_url}/video/{media_id}.mp4"', tweet)
+        return tweet
+
+    def render_following(self, owner, position):
+        rng = self._rng("following", owner, position)
+        handle = f"artist_{rng.randrange(5000)}"
+        row = self.following_template.replace(FOLLOWING_FIXTURE_HANDLE, handle)
+        row = row.replace(FOLLOWING_FIXTURE_NAME, html.escape(f"Artist {handle[7:]}"))
+        return row.replace(FOLLOWING_FIXTURE_ID, str(10 ** 18 + rng.randrange(10 ** 17)))
+
+    def feed_page(self, base_url, kind, key, offset):
+        """Returns (html, next offset, done) for the page of a feed starting at offset."""
+        if kind == "timeline":
+            limit, render = None, lambda i: self.render_tweet(base_url, "timeline", i)
+        elif kind == "search":
+            author_match = re.search(r"from:(\S+)", key)
+            author = author_match.group(1) if author_match else None
+            limit, render = self.settings.search_results, lambda i: self.render_tweet(base_url, key, i, author)
+        else:
+            limit, render = self.settings.following_count, lambda i: self.render_following(key, i)
+
+        end = offset + PAGE_SIZE if limit is None else min(offset + PAGE_SIZE, limit)
+        items = "".join(render(i) for i in range(offset, end))
+        return items, end, limit is not None and end >= limit
+
+    def _page(self, request, title, kind, key, header=""):
+        base_url = f"{request.scheme}://{request.host}"
+        items, next_offset, done = self.feed_page(base_url, kind, key, 0)
+        body = PAGE_TEMPLATE.format(title=html.escape(title), header=header, items=items, next_offset=next_offset,
+                                    done="true" if done else "false", kind=kind, key=quote(key))
+        return web.Response(text=body, content_type="text/html")
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        self.requests += 1
+        if self.settings.latency_ms:
+            await asyncio.sleep(self.settings.latency_ms / 1000)
+        return await handler(request)
+
+    def _should_fail(self):
+        return self.fault_rng.random() < self.settings.failure_rate
+
+    async def handle_root(self, request):
+        return self._page(request, "Home", "timeline", "timeline")
+
+    async def handle_login(self, request):
+        return web.Response(text=LOGIN_PAGE, content_type="text/html")
+
+    async def handle_search(self, request):
+        query = request.query.get("q", "")
+        return self._page(request, f"{query} - Search", "search", query)
+
+    async def handle_following(self, request):
+        handle = request.match_info["handle"]
+        header = self.profile_template.replace(PROFILE_FIXTURE_HANDLE, handle)
+        header = header.replace(PROFILE_FIXTURE_NAME, html.escape(f"Artist {handle}"))
+        return self._page(request, f"People followed by @{handle}", "following", handle, header)
+
+    async def handle_feed(self, request):
+        if self._should_fail():
+            return web.Response(status=503, text="Service Unavailable")
+        offset = int(request.query.get("offset", "0"))
+        headers = {"X-Next-Offset": str(offset)}
+        if self.fault_rng.random() < self.settings.rate_limit_rate:
+            return web.Response(text=self.rate_limit_html, content_type="text/html", headers=headers)
+
+        base_url = f"{request.scheme}://{request.host}"
+        items, next_offset, done = self.feed_page(base_url, request.query["kind"], request.query["key"], offset)
+        headers = {"X-Next-Offset": str(next_offset), "X-Done": "1" if done else "0"}
+        return web.Response(text=items, content_type="text/html", headers=headers)
+
+    def _media_response(self, request, size, content_type):
+        if self._should_fail():
+            return web.Response(status=503, text="Service Unavailable")
+        if request.method != "HEAD":
+            self.media_bytes_sent += size
+        body = b"" if request.method == "HEAD" else self.media_payload[:size]
+        return web.Response(body=body, headers={"Content-Type": content_type, "Content-Length": str(size)})
+
+    async def handle_media(self, request):
+        query = parse_qs(request.query_string)
+        name = query.get("name", ["medium"])[0]
+        media_format = query.get("format", ["jpg"])[0]
+        size = MEDIA_VARIANT_BYTES.get(name, MEDIA_VARIANT_BYTES["medium"])
+        content_type = "image/png" if media_format == "png" else "image/jpeg"
+        return self._media_response(request, size, content_type)
+
+    async def handle_video(self, request):
+        return self._media_response(request, VIDEO_BYTES, "video/mp4")
+
+    def make_app(self):
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get("/", self.handle_root)
+        app.router.add_get("/home", self.handle_root)
+        app.router.add_get("/i/flow/login", self.handle_login)
+        app.router.add_get("/search", self.handle_search)
+        app.router.add_get("/_mock/feed", self.handle_feed)
+        app.router.add_get("/media/{media_id}", self.handle_media)
+        app.router.add_get("/video/{media_id}", self.handle_video)
+        app.router.add_get("/{handle}/following", self.handle_following)
+        return app
+
+async def start_mock_server(settings: MockSettings, host="127.0.0.1", port=0):
+    """
+    Starts the mock server on the running event loop.
+
+    Returns:
+        (runner, base_url, mock). Call `await runner.cleanup()` to stop it.
+    """
+    mock = MockX(settings)
+    runner = web.AppRunner(mock.make_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}", mock
+
+def add_mock_arguments(parser):
+    """Adds the mock server's latency and failure-injection arguments."""
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Delay added to every response, in milliseconds.")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Fraction of feed and media requests that fail with HTTP 503.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of feed pages replaced by the rate-limit banner.")
+    parser.add_argument("--search-results", type=int, default=100,
+                        help="Number of tweets each search returns.")
+    parser.add_argument("--following-count", type=int, default=200,
+                        help="Number of accounts in each following list.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for the synthetic data.")
+
+def settings_from_args(args):
+    return MockSettings(latency_ms=args.latency_ms, failure_rate=args.failure_rate,
+                        rate_limit_rate=args.rate_limit_rate, search_results=args.search_results,
+                        following_count=args.following_count, seed=args.seed)
+
+async def run_mock_server(args):
+    """Serves the mock X site until interrupted."""
+    runner, base_url, _ = await start_mock_server(settings_from_args(args), args.host, args.port)
+    print(f"Mock X serving at {base_url}")
+    print(f"Point the scraper at it with X_BASE_URL={base_url} X_MEDIA_BASE_URL={base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for x.com.")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_mock_arguments(parser)
+    asyncio.run(run_mock_server(parser.parse_args()))
@@ -0,0 +1,193 @@
+import os
+import re
+import datetime
+from sys import intern
+from typing import Iterable, Iterator, List, Optional, Union
+
+from codec import iter_jsonl, write_jsonl
+
+_OPTIONAL_STR = (str, type(None))
+# Run directories end in their scrape time: "{YYYYmmdd_HHMMSS}" or "{username}_{YYYYmmdd_HHMMSS}".
+RUN_TIME_PATTERN = re.compile(r"(\d{8}_\d{6})$")
+
+def _field_error(data: dict) -> str:
+    """Describes the first invalid field of data, for RecordError messages."""
+    tweet_id = data.get("id")
+    if type(tweet_id) is not str or not tweet_id:
+        return "missing or non-string id"
+    for name in ("url", "author", "author_handle", "timestamp", "text"):
+        if type(data.get(name)) not in _OPTIONAL_STR:
+            return f"{name} must be a string"
+    stats = data.get("stats") or {}
+    if type(stats) is not dict or not all(type(v) is int for v in stats.values()):
+        return "stats must map names to integers"
+    for name in ("media_urls", "media_local_paths"):
+        value = data.get(name) or []
+        if type(value) is not list or not all(type(v) is str for v in value):
+            return f"{name} must be a list of strings"
+    return "invalid record"
+
+class RecordError(ValueError):
+    """Raised when a decoded JSON object is not a valid tweet record."""
+
+class TweetRecord:
+    """
+    A scraped tweet.
+
+    Uses __slots__ instead of a per-tweet dict, and interns author names and
+    handles, which repeat across thousands of tweets. Unknown keys from JSONL
+    files are kept in `extra` so records round-trip unchanged.
+
+    Supports the dict-style access (`tweet["stats"]`, `tweet.get("id")`) used
+    throughout the pipeline, so records and plain dicts are interchangeable.
+    """
+    __slots__ = ("id", "url", "_author", "_author_handle", "timestamp", "text",
+                 "stats", "media_urls", "media_local_paths", "extra")
+
+    FIELDS = ("id", "url", "author", "author_handle", "timestamp", "text",
+              "stats", "media_urls", "media_local_paths")
+
+    def __init__(self, id: str, url: Optional[str] = None, author: Optional[str] = None,
+                 author_handle: Optional[str] = None, timestamp: Optional[str] = None,
+                 text: Optional[str] = None, stats: Optional[dict] = None,
+                 media_urls: Optional[List[str]] = None, media_local_paths: Optional[List[str]] = None,
+                 extra: Optional[dict] = None):
+        self.id = id
+        self.url = url
+        self.author = author
+        self.author_handle = author_handle
+        self.timestamp = timestamp
+        self.text = text
+        self.stats = stats if stats is not None else {}
+        self.media_urls = media_urls if media_urls is not None else []
+        self.media_local_paths = media_local_paths if media_local_paths is not None else []
+        self.extra = extra
+
+    @property
+    def author(self):
+        return self._author
+
+    @author.setter
+    def author(self, value):
+        self._author = intern(value) if value else value
+
+    @property
+    def author_handle(self):
+        return self._author_handle
+
+    @author_handle.setter
+    def author_handle(self, value):
+        self._author_handle = intern(value) if value else value
+
+    @classmethod
+    def from_dict(cls, data) -> "TweetRecord":
+        """
+        Builds a record from a decoded JSON object, validating field types.
+
+        Raises:
+            RecordError: If data is not an object, has no string id, or a field
+                has the wrong type.
+        """
+        if type(data) is not dict:
+            raise RecordError(f"expected an object, got {type(data).__name__}")
+        get = data.get
+        tweet_id, url, author, handle, timestamp, text, stats, media_urls, media_local_paths = (
+            get("id"), get("url"), get("author"), get("author_handle"), get("timestamp"), get("text"),
+            get("stats") or {}, get("media_urls") or [], get("media_local_paths") or [])
+
+        # One cheap pass over every field; _field_error works out which one failed.
+        try:
+            # str.join rejects non-string items in C, far faster than a generator.
+            "".join(media_urls)
+            "".join(media_local_paths)
+            valid = (type(tweet_id) is str and tweet_id != ""
+                     and type(url) in _OPTIONAL_STR and type(author) in _OPTIONAL_STR
+                     and type(handle) in _OPTIONAL_STR and type(timestamp) in _OPTIONAL_STR
+                     and type(text) in _OPTIONAL_STR
+                     and type(stats) is dict and all(type(v) is int for v in stats.values())
+                     and type(media_urls) is list and type(media_local_paths) is list)
+        except TypeError:
+            valid = False
+        if not valid:
+            raise RecordError(_field_error(data))
+
+        # Bypasses __init__ so the interning properties are not called per field.
+        record = cls.__new__(cls)
+        record.id = tweet_id
+        record.url = url
+        record._author = intern(author) if author else author
+        record._author_handle = intern(handle) if handle else handle
+        record.timestamp = timestamp
+        record.text = text
+        record.stats = stats
+        record.media_urls = media_urls
+        record.media_local_paths = media_local_paths
+        record.extra = None if data.keys() <= _FIELD_SET else {
+            k: v for k, v in data.items() if k not in _FIELD_SET}
+        return record
+
+    def to_dict(self) -> dict:
+        data = {
+            "id": self.id, "url": self.url, "author": self.author, "author_handle": self.author_handle,
+            "timestamp": self.timestamp, "text": self.text, "stats": self.stats, "media_urls": self.media_urls,
+            "media_local_paths": self.media_local_paths,
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return key in self.FIELDS or bool(self.extra and key in self.extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"TweetRecord(id={self.id!r}, author_handle={self.author_handle!r})"
+
+_FIELD_SET = frozenset(TweetRecord.FIELDS)
+
+def iter_tweets(path: str) -> Iterator[TweetRecord]:
+    """Yields the valid tweet records of a tweets.jsonl file, reporting and skipping the rest."""
+    for data in iter_jsonl(path):
+        try:
+            yield TweetRecord.from_dict(data)
+        except RecordError as e:
+            print(f"Skipping invalid tweet in {path}: {e}")
+
+def read_tweets(path: str) -> List[TweetRecord]:
+    return list(iter_tweets(path))
+
+def write_tweets(path: str, tweets: Iterable[Union[TweetRecord, dict]]):
+    """Writes tweets (records or plain dicts) to a JSONL file."""
+    write_jsonl(path, (t.to_dict() if isinstance(t, TweetRecord) else t for t in tweets))
+
+def run_scraped_at(jsonl_path: str) -> float:
+    """
+    Returns when a run was scraped, from its directory name.
+
+    Falls back to the file's mtime for directories not named by the scraper.
+    Unlike the mtime, the name does not change when a run file is touched or copied.
+    """
+    match = RUN_TIME_PATTERN.search(os.path.basename(os.path.dirname(os.path.abspath(jsonl_path))))
+    if match:
+        return datetime.datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").timestamp()
+    return os.path.getmtime(jsonl_path)
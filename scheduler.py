@@ -0,0 +1,169 @@
+import os
+import re
+import math
+import datetime
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from config import config
+from curator import read_usernames
+from records import iter_tweets
+
+# Run directories written by user_scrape are named "{username}_{YYYYmmdd_HHMMSS}".
+USER_RUN_DIR_PATTERN = re.compile(r"^(.+)_(\d{8}_\d{6})$")
+
+# Prior belief about an artist's posting rate (one post a week), blended with
+# what we have observed so that artists with few scraped tweets are not
+# written off or over-trusted.
+PRIOR_POSTS = 0.5
+PRIOR_DAYS = 3.5
+# An artist is due once this many new tweets are expected since the last scrape.
+MIN_EXPECTED_TWEETS = 1.0
+# Tweets loaded per scroll of a search page, used to estimate a search's duration.
+TWEETS_PER_SCROLL = 5
+
+@dataclass
+class ArtistSchedule:
+    username: str
+    observed_tweets: int = 0
+    posts_per_day: float = PRIOR_POSTS / PRIOR_DAYS
+    last_scraped: Optional[datetime.datetime] = None
+    expected_new: float = math.inf
+    next_due: Optional[datetime.datetime] = None
+    estimated_seconds: float = 0.0
+    selected: bool = False
+    reason: str = ""
+    # Posting time of each tweet seen, keyed by tweet ID so copies from several runs count once.
+    tweet_timestamps: Dict[str, datetime.datetime] = field(default_factory=dict, repr=False)
+
+def _parse_tweet_time(value: Optional[str]) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone()
+    except ValueError:
+        return None
+
+def load_history(data_root: str) -> Dict[str, ArtistSchedule]:
+    """
+    Collects each artist's tweet timestamps (by tweet ID) and most recent scrape
+    time from the user_scrape run directories under data_root, keyed by
+    lowercased username.
+    """
+    history = {}
+    if not os.path.isdir(data_root):
+        return history
+
+    for dir_name in os.listdir(data_root):
+        match = USER_RUN_DIR_PATTERN.match(dir_name)
+        jsonl_path = os.path.join(data_root, dir_name, "tweets.jsonl")
+        if not match or not os.path.isfile(jsonl_path):
+            continue
+
+        username = match.group(1)
+        scraped_at = datetime.datetime.strptime(match.group(2), "%Y%m%d_%H%M%S").astimezone()
+        artist = history.setdefault(username.lower(), ArtistSchedule(username=username))
+        if artist.last_scraped is None or scraped_at > artist.last_scraped:
+            artist.last_scraped = scraped_at
+
+        for tweet in iter_tweets(jsonl_path):
+            posted_at = _parse_tweet_time(tweet.timestamp)
+            if posted_at:
+                artist.tweet_timestamps[tweet.id] = posted_at
+    return history
+
+def estimate_search_seconds(expected_tweets: float, limit: Optional[int] = None) -> float:
+    """Estimates how long scrape_from_search takes to collect expected_tweets."""
+    if limit is not None:
+        expected_tweets = min(expected_tweets, limit)
+    scrolls = math.ceil(expected_tweets / TWEETS_PER_SCROLL) + config.SCROLL_MAX_STALLS
+    return config.SEARCH_PAGE_LOAD_DELAY + scrolls * config.SCROLL_NEW_CONTENT_DELAY
+
+def score_artist(artist: ArtistSchedule, now: datetime.datetime, limit: Optional[int] = None):
+    """Fills in an artist's posting rate, expected new tweets, next due time and cost."""
+    timestamps = sorted(artist.tweet_timestamps.values())
+    artist.observed_tweets = len(timestamps)
+
+    if artist.last_scraped is None:
+        artist.reason = "never scraped"
+        artist.expected_new = math.inf
+        artist.next_due = now
+        artist.estimated_seconds = estimate_search_seconds(limit or TWEETS_PER_SCROLL * 4, limit)
+        return
+
+    # The search only returns recent tweets, so the observed window runs from the
+    # oldest tweet we have to the last time we looked.
+    observed_days = 0.0
+    if timestamps:
+        observed_days = max((artist.last_scraped - timestamps[0]).total_seconds() / 86400, 0.0)
+    artist.posts_per_day = (len(timestamps) + PRIOR_POSTS) / (observed_days + PRIOR_DAYS)
+
+    days_since_scrape = max((now - artist.last_scraped).total_seconds() / 86400, 0.0)
+    artist.expected_new = artist.posts_per_day * days_since_scrape
+    artist.next_due = artist.last_scraped + datetime.timedelta(days=MIN_EXPECTED_TWEETS / artist.posts_per_day)
+    artist.estimated_seconds = estimate_search_seconds(artist.expected_new, limit)
+    artist.reason = f"{artist.posts_per_day:.2f} posts/day, {days_since_scrape:.1f} days since last scrape"
+
+def plan_refresh(usernames: List[str], data_root: str, max_searches: Optional[int] = None,
+                 max_minutes: Optional[float] = None, limit: Optional[int] = None,
+                 now: Optional[datetime.datetime] = None) -> List[ArtistSchedule]:
+    """
+    Ranks artists by expected new tweets and picks a run's work set.
+
+    Artists that are due are taken greedily in order of expected new tweets per
+    estimated second of searching, until the search count or time budget runs out.
+
+    Returns:
+        Every artist's schedule, selected ones first, in priority order.
+    """
+    now = now or datetime.datetime.now().astimezone()
+    history = load_history(data_root)
+
+    schedules = []
+    for username in dict.fromkeys(usernames):
+        artist = history.get(username.lower(), ArtistSchedule(username=username))
+        artist.username = username
+        score_artist(artist, now, limit)
+        schedules.append(artist)
+
+    schedules.sort(key=lambda a: a.expected_new / max(a.estimated_seconds, 1.0), reverse=True)
+
+    budget_seconds = max_minutes * 60 if max_minutes is not None else math.inf
+    searches = 0
+    for artist in schedules:
+        if artist.expected_new < MIN_EXPECTED_TWEETS:
+            artist.reason += f"; not due until {artist.next_due:%Y-%m-%d %H:%M}"
+            continue
+        if max_searches is not None and searches >= max_searches:
+            artist.reason += "; over search budget"
+            continue
+        if artist.estimated_seconds > budget_seconds:
+            artist.reason += "; over time budget"
+            continue
+        artist.selected = True
+        searches += 1
+        budget_seconds -= artist.estimated_seconds
+
+    schedules.sort(key=lambda a: not a.selected)
+    return schedules
+
+def run_plan(args):
+    """Prints which artists a scheduled user_scrape run would search, and why."""
+    try:
+        usernames = read_usernames(args.input_csv)
+    except FileNotFoundError:
+        print(f"Error: Input CSV file not found at {args.input_csv}")
+        return
+
+    schedules = plan_refresh(usernames, args.output_dir, max_searches=args.max_searches,
+                             max_minutes=args.max_minutes, limit=args.max_artist_tweets)
+    selected = [a for a in schedules if a.selected]
+    for artist in schedules:
+        marker = "*" if artist.selected else " "
+        expected = "new" if math.isinf(artist.expected_new) else f"{artist.expected_new:.1f}"
+        print(f"{marker} {artist.username:<24} expected {expected:>6} | ~{artist.estimated_seconds:.0f}s | {artist.reason}")
+
+    total_expected = sum(a.expected_new for a in selected if not math.isinf(a.expected_new))
+    total_minutes = sum(a.estimated_seconds for a in selected) / 60
+    print(f"\nWould search {len(selected)} of {len(schedules)} artists "
+          f"(~{total_expected:.0f} expected tweets from known artists, ~{total_minutes:.0f} min).")
@@ -10,6 +10,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from config import config # Assuming config.py is in the same directory
+from records import TweetRecord
 
 # CSS selectors for various tweet elements
 TWEET_SELECTORS = {
@@ -34,6 +35,7 @@ STAT_PATTERNS = {
 
 class XScraper:
     def __init__(self, headless=True, cookie_file="cookies.json"):
+        config.validate_credentials()
         self.cookie_file = cookie_file
         self.driver = self._initialize_driver(headless)
         self.wait = WebDriverWait(self.driver, 120) # Increased timeout for manual login
@@ -82,11 +84,11 @@ class XScraper:
 
     def login(self):
         print("Attempting to load cookies...")
-        self.driver.get("https://x.com") 
+        self.driver.get(config.X_BASE_URL)
 
         if self._load_cookies():
             print("Cookies loaded, refreshing page to apply session...")
-            self.driver.get("https://x.com/home")
+            self.driver.get(f"{config.X_BASE_URL}/home")
             time.sleep(config.LOGIN_COOKIE_APPLY_DELAY)
             
             print(f"Current URL after loading cookies: {self.driver.current_url}")
@@ -97,7 +99,7 @@ class XScraper:
                 print("Cookies did not result in a logged-in session.")
         
         print("Proceeding with manual login flow...")
-        self.driver.get("https://x.com/i/flow/login")
+        self.driver.get(f"{config.X_BASE_URL}/i/flow/login")
 
         try:
             username_input = self.wait.until(EC.presence_of_element_located((By.NAME, "text")))
@@ -176,18 +178,15 @@ class XScraper:
                     if tweet_id in seen_tweet_ids: continue
                     seen_tweet_ids.add(tweet_id)
                     
-                    tweet_data = {
-                        "id": tweet_id, "url": tweet_url, "author": None, "author_handle": None, "timestamp": None,
-                        "text": None, "stats": {}, "media_urls": [],
-                    }
+                    tweet_data = TweetRecord(tweet_id, url=tweet_url)
 
-                    try: tweet_data["author"] = tweet_element.find_element(By.CSS_SELECTOR, TWEET_SELECTORS["author_link"]).text
+                    try: tweet_data.author = tweet_element.find_element(By.CSS_SELECTOR, TWEET_SELECTORS["author_link"]).text
                     except: pass
-                    try: tweet_data["author_handle"] = tweet_element.find_element(By.CSS_SELECTOR, TWEET_SELECTORS["author_handle"]).text
+                    try: tweet_data.author_handle = tweet_element.find_element(By.CSS_SELECTOR, TWEET_SELECTORS["author_handle"]).text
                     except: pass
-                    try: tweet_data["timestamp"] = tweet_element.find_element(by=By.CSS_SELECTOR, value=TWEET_SELECTORS["timestamp_link"]).get_attribute("datetime")
+                    try: tweet_data.timestamp = tweet_element.find_element(by=By.CSS_SELECTOR, value=TWEET_SELECTORS["timestamp_link"]).get_attribute("datetime")
                     except: pass
-                    try: tweet_data["text"] = tweet_element.find_element(By.CSS_SELECTOR, TWEET_SELECTORS["text"]).text
+                    try: tweet_data.text = tweet_element.find_element(By.CSS_SELECTOR, TWEET_SELECTORS["text"]).text
                     except: pass
 
                     try:
@@ -197,7 +196,7 @@ class XScraper:
                             for stat_name, pattern in STAT_PATTERNS.items():
                                 match_stat = re.search(pattern, aria_label)
                                 if match_stat:
-                                    tweet_data["stats"][stat_name] = int(match_stat.group(1).replace(',', ''))
+                                    tweet_data.stats[stat_name] = int(match_stat.group(1).replace(',', ''))
                     except Exception: pass
 
                     try:
@@ -205,7 +204,7 @@ class XScraper:
                         for media_el in media_elements:
                             src = media_el.get_attribute("src")
                             if src and not src.startswith("data:"):
-                                tweet_data["media_urls"].append(src)
+                                tweet_data.media_urls.append(src)
                     except Exception: pass
 
                     collected_tweets_data.append(tweet_data)
@@ -231,7 +230,7 @@ class XScraper:
     def scroll_and_extract(self, max_tweets=50, max_minutes=5):
         if "home" not in self.driver.current_url:
             print("Navigating to X home page (For You tab)...")
-            self.driver.get("https://x.com/home")
+            self.driver.get(f"{config.X_BASE_URL}/home")
             self.wait.until(EC.url_contains("home"))
             time.sleep(config.SCROLL_INITIAL_LOAD_DELAY)
         
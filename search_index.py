@@ -0,0 +1,282 @@
+import os
+import re
+import time
+import sqlite3
+from typing import List, Optional
+
+import codec
+from choices import SORT_COLUMNS, STAT_FILTERS
+from config import config
+from records import RUN_TIME_PATTERN, iter_tweets, run_scraped_at
+
+# Hiragana, katakana, CJK ideographs (incl. extension A), hangul and half-width katakana.
+CJK_RANGES = "぀-ヿ㐀-䶿一-鿿가-힯ｦ-ﾟ"
+TOKEN_PATTERN = re.compile(rf"[{CJK_RANGES}]+|[^\W{CJK_RANGES}]+")
+CJK_RUN_PATTERN = re.compile(rf"[{CJK_RANGES}]+")
+HASHTAG_PATTERN = re.compile(r"[#＃](\w+)")
+
+def tokenize(text: Optional[str], for_index: bool = False) -> List[str]:
+    """
+    Splits text into search tokens.
+
+    Latin-script words are lowercased as-is. Japanese and other CJK runs have no
+    word boundaries, so they are split into overlapping character bigrams; a
+    query tokenized the same way matches any text containing it as a substring.
+    When indexing, the last character of each run is also kept as a unigram so
+    that every character starts some token and single-character queries can be
+    answered with a prefix match.
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text or ""):
+        token = match.group(0).lower()
+        if CJK_RUN_PATTERN.fullmatch(token) and len(token) > 1:
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+            if for_index:
+                tokens.append(token[-1])
+        else:
+            tokens.append(token)
+    return tokens
+
+def extract_hashtags(text: Optional[str]) -> List[str]:
+    return [tag.lower() for tag in HASHTAG_PATTERN.findall(text or "")]
+
+def _quote(token: str) -> str:
+    return '"' + token.replace('"', '""') + '"'
+
+def build_match_query(query: str) -> str:
+    """
+    Translates a user query into an FTS5 MATCH expression.
+
+    Terms are ANDed together. `#tag` matches hashtags and `@handle` matches the
+    author handle; any other term is matched against the tweet text.
+    """
+    clauses = []
+    for term in query.split():
+        if term[0] in "#＃" and len(term) > 1:
+            clauses.append(f"hashtags : {_quote(term[1:].lower())}")
+        elif term.startswith("@") and len(term) > 1:
+            clauses.append(f"handle : {_quote(term[1:].lower())}")
+        else:
+            tokens = tokenize(term)
+            if tokens:
+                phrases = [_quote(t) + ("*" if CJK_RUN_PATTERN.fullmatch(t) and len(t) == 1 else "") for t in tokens]
+                clauses.append(f"body : ({' '.join(phrases)})")
+    return " AND ".join(clauses)
+
+class SearchIndex:
+    """
+    An incremental SQLite FTS5 index over every tweets.jsonl under a data root.
+
+    Run files are tracked by size and mtime, so refresh() only re-reads runs that
+    are new or were rewritten, and runs whose files are gone are dropped. Tweets
+    are keyed by ID; the copy from the most recently scraped run is kept, whatever
+    order runs are indexed in, so stats stay current.
+    """
+    def __init__(self, index_file: str = config.SEARCH_INDEX_FILE):
+        index_dir = os.path.dirname(index_file)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+        self.conn = sqlite3.connect(index_file)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS runs (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tweets (
+                rowid INTEGER PRIMARY KEY,
+                id TEXT UNIQUE NOT NULL,
+                run_path TEXT NOT NULL,
+                author_handle TEXT,
+                timestamp TEXT,
+                replies INTEGER NOT NULL DEFAULT 0,
+                reposts INTEGER NOT NULL DEFAULT 0,
+                likes INTEGER NOT NULL DEFAULT 0,
+                bookmarks INTEGER NOT NULL DEFAULT 0,
+                views INTEGER NOT NULL DEFAULT 0,
+                scraped_at REAL NOT NULL DEFAULT 0,
+                data TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5(
+                body, handle, hashtags, content = '', tokenize = 'unicode61 remove_diacritics 2'
+            );
+        """)
+        # Indexes created before scraped_at was tracked; their rows are replaced by any re-index.
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(tweets)")}
+        if "scraped_at" not in columns:
+            self.conn.execute("ALTER TABLE tweets ADD COLUMN scraped_at REAL NOT NULL DEFAULT 0")
+
+    def close(self):
+        self.conn.close()
+
+    def _delete_tweet(self, row):
+        self.conn.execute(
+            "INSERT INTO tweets_fts (tweets_fts, rowid, body, handle, hashtags) VALUES ('delete', ?, ?, ?, ?)",
+            (row["rowid"], row["body"], row["handle"], row["hashtags"]),
+        )
+        self.conn.execute("DELETE FROM tweets WHERE rowid = ?", (row["rowid"],))
+
+    def _fts_columns(self, tweet: dict):
+        handle = (tweet.get("author_handle") or "").lstrip("@").lower()
+        return (
+            " ".join(tokenize(tweet.get("text"), for_index=True)),
+            handle,
+            " ".join(extract_hashtags(tweet.get("text"))),
+        )
+
+    def _existing_row(self, where: str, params):
+        """Fetches tweets rows matching where, with the FTS columns needed to delete them."""
+        rows = self.conn.execute(f"SELECT rowid, scraped_at, data FROM tweets WHERE {where}", params).fetchall()
+        result = []
+        for row in rows:
+            body, handle, hashtags = self._fts_columns(codec.loads(row["data"]))
+            result.append({"rowid": row["rowid"], "scraped_at": row["scraped_at"],
+                           "body": body, "handle": handle, "hashtags": hashtags})
+        return result
+
+    def drop_run(self, run_path: str):
+        """Removes a run file's tweets and its runs entry from the index."""
+        for row in self._existing_row("run_path = ?", (run_path,)):
+            self._delete_tweet(row)
+        self.conn.execute("DELETE FROM runs WHERE path = ?", (run_path,))
+
+    def index_run(self, jsonl_path: str) -> int:
+        """
+        (Re)indexes a single tweets.jsonl file and returns the number of tweets read.
+
+        A tweet already indexed from a more recently scraped run is left as is.
+        """
+        run_path = os.path.abspath(jsonl_path)
+        scraped_at = run_scraped_at(jsonl_path)
+        self.drop_run(run_path)
+
+        count = 0
+        for tweet in iter_tweets(jsonl_path):
+            count += 1
+            existing = self._existing_row("id = ?", (tweet.id,))
+            if any(row["scraped_at"] > scraped_at for row in existing):
+                continue
+            for row in existing:
+                self._delete_tweet(row)
+
+            stats = tweet.stats
+            cursor = self.conn.execute(
+                """INSERT INTO tweets (id, run_path, author_handle, timestamp,
+                                       replies, reposts, likes, bookmarks, views, scraped_at, data)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    tweet.id, run_path, tweet.author_handle, tweet.timestamp,
+                    stats.get("reply", 0), stats.get("repost", 0), stats.get("like", 0),
+                    stats.get("bookmark", 0), stats.get("view", 0), scraped_at,
+                    codec.dumps(tweet.to_dict()),
+                ),
+            )
+            self.conn.execute(
+                "INSERT INTO tweets_fts (rowid, body, handle, hashtags) VALUES (?, ?, ?, ?)",
+                (cursor.lastrowid, *self._fts_columns(tweet)),
+            )
+
+        stat = os.stat(jsonl_path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO runs (path, size, mtime) VALUES (?, ?, ?)",
+            (run_path, stat.st_size, stat.st_mtime),
+        )
+        return count
+
+    def refresh(self, data_root: str) -> int:
+        """
+        Indexes any run directory under data_root whose tweets.jsonl is new or
+        changed, and drops indexed runs under data_root whose file is gone. Older
+        runs are then re-read too, since they may hold copies of the dropped
+        tweets that were skipped in favor of the newer run.
+
+        Returns:
+            The number of run files that were (re)indexed.
+        """
+        known_runs = {row["path"]: (row["size"], row["mtime"]) for row in self.conn.execute("SELECT * FROM runs")}
+        root_prefix = os.path.join(os.path.abspath(data_root), "")
+        vanished = [path for path in known_runs if path.startswith(root_prefix) and not os.path.isfile(path)]
+        newest_vanished = max((run_scraped_at(path) for path in vanished
+                               if RUN_TIME_PATTERN.search(os.path.dirname(path))), default=None)
+
+        changed = []
+        for dir_name in os.listdir(data_root):
+            jsonl_path = os.path.join(data_root, dir_name, "tweets.jsonl")
+            if not os.path.isfile(jsonl_path):
+                continue
+            stat = os.stat(jsonl_path)
+            scraped_at = run_scraped_at(jsonl_path)
+            if (known_runs.get(os.path.abspath(jsonl_path)) != (stat.st_size, stat.st_mtime)
+                    or (vanished and (newest_vanished is None or scraped_at < newest_vanished))):
+                changed.append((scraped_at, jsonl_path))
+
+        with self.conn:
+            for run_path in vanished:
+                self.drop_run(run_path)
+                print(f"Dropped {run_path} from the index (file no longer exists)")
+            for _, jsonl_path in sorted(changed):
+                count = self.index_run(jsonl_path)
+                print(f"Indexed {count} tweets from {jsonl_path}")
+        return len(changed)
+
+    def search(self, query: str, filters: Optional[dict] = None, sort_by: str = "rank", limit: int = 20) -> List[dict]:
+        """
+        Runs a ranked full-text query.
+
+        Args:
+            query: Space-separated terms; see build_match_query().
+            filters: Maps stat names ("like", "view", ...) to minimum values.
+            sort_by: One of SORT_COLUMNS.
+            limit: Maximum number of tweets to return.
+        """
+        match_query = build_match_query(query)
+        if not match_query:
+            return []
+
+        where = ["tweets_fts MATCH ?"]
+        params = [match_query]
+        stat_columns = {"reply": "replies", "repost": "reposts", "like": "likes", "bookmark": "bookmarks", "view": "views"}
+        for stat, minimum in (filters or {}).items():
+            if minimum:
+                where.append(f"tweets.{stat_columns[stat]} >= ?")
+                params.append(minimum)
+        params.append(limit)
+
+        rows = self.conn.execute(
+            f"""SELECT tweets.data FROM tweets_fts
+                JOIN tweets ON tweets.rowid = tweets_fts.rowid
+                WHERE {' AND '.join(where)}
+                ORDER BY {SORT_COLUMNS[sort_by]}
+                LIMIT ?""",
+            params,
+        ).fetchall()
+        return [codec.loads(row["data"]) for row in rows]
+
+def run_search(args):
+    """Refreshes the search index and prints tweets matching a query."""
+    if not os.path.isdir(args.data_root):
+        print(f"Error: {args.data_root} not found.")
+        return
+
+    index = SearchIndex(args.index_file)
+    try:
+        index.refresh(args.data_root)
+
+        filters = {stat: getattr(args, arg_name) for arg_name, stat in STAT_FILTERS.items()}
+        start_time = time.perf_counter()
+        results = index.search(args.query, filters=filters, sort_by=args.sort_by, limit=args.limit)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+        for tweet in results:
+            if args.json:
+                print(codec.dumps(tweet))
+                continue
+            stats = tweet.get("stats", {})
+            text = (tweet.get("text") or "").replace("\n", " ")
+            print(f"{tweet.get('author_handle')} | likes {stats.get('like', 0)} | views {stats.get('view', 0)} | {tweet.get('url')}")
+            print(f"    {text[:200]}")
+        print(f"{len(results)} results in {elapsed_ms:.1f} ms.")
+    finally:
+        index.close()
@@ -1,8 +1,16 @@
 import os
-import json
 import shutil
 
-async def run_selector(args):
+from choices import STAT_FILTERS, TREND_SORT_KEYS
+from records import iter_tweets, write_tweets
+
+def passes_stat_filters(tweet, args):
+    """Returns True if the tweet's stats meet every --min-* threshold in args."""
+    # Assuming stats are already integers from scraper.py
+    stats = tweet.get("stats", {})
+    return all(stats.get(stat, 0) >= getattr(args, arg_name) for arg_name, stat in STAT_FILTERS.items())
+
+def run_selector(args):
     """Selects and filters tweets based on specified criteria."""
     input_jsonl_path = os.path.join(args.input_dir, "tweets.jsonl")
     if not os.path.exists(input_jsonl_path):
@@ -18,36 +26,44 @@ async def run_selector(args):
     if not os.path.exists(output_media_path):
         os.makedirs(output_media_path)
 
-    selected_tweets = []
-    with open(input_jsonl_path, "r", encoding="utf-8") as f:
-        for line in f:
-            try:
-                tweet = json.loads(line)
-                # Assuming stats are already integers from scraper.py
-                stats = tweet.get("stats", {})
-                if (stats.get("reply", 0) >= args.min_replies and
-                    stats.get("repost", 0) >= args.min_reposts and
-                    stats.get("like", 0) >= args.min_likes and
-                    stats.get("bookmark", 0) >= args.min_bookmarks and
-                    stats.get("view", 0) >= args.min_views):
-                    selected_tweets.append(tweet)
-            except json.JSONDecodeError:
-                print(f"Skipping invalid line in {input_jsonl_path}")
-
-    sort_key_stat = "like" if args.sort_by == "likes" else "view"
-    selected_tweets.sort(key=lambda t: t.get("stats", {}).get(sort_key_stat, 0), reverse=True)
-
-    with open(output_jsonl_path, "w", encoding="utf-8") as f:
-        for tweet in selected_tweets:
-            f.write(json.dumps(tweet, ensure_ascii=False) + "\n")
+    selected_tweets = [tweet for tweet in iter_tweets(input_jsonl_path) if passes_stat_filters(tweet, args)]
+
+    if args.sort_by in TREND_SORT_KEYS:
+        from stats_store import StatsStore
+        trend = StatsStore(args.stats_store).metric_by_id(args.sort_by)
+        selected_tweets.sort(key=lambda t: trend.get(t.get("id"), 0), reverse=True)
+    else:
+        sort_key_stat = "like" if args.sort_by == "likes" else "view"
+        selected_tweets.sort(key=lambda t: t.get("stats", {}).get(sort_key_stat, 0), reverse=True)
+
+    write_tweets(output_jsonl_path, selected_tweets)
 
     input_media_path = os.path.join(args.input_dir, "media")
+
+    # Tweets are sorted best-first, so the first copy of a near-duplicate wins.
+    media_index = None
+    selected_hashes = None
+    skipped_duplicates = 0
+    if args.max_hash_distance is not None and os.path.isdir(input_media_path):
+        from media_index import BKTree, MediaIndex, find_images
+        selected_hashes = BKTree()
+        media_index = MediaIndex()
+        media_index.update(find_images(input_media_path))
+
     for tweet in selected_tweets:
         for media_path in tweet.get("media_local_paths", []):
             if media_path:
                 base_filename = os.path.basename(media_path)
                 src_media_path = os.path.join(input_media_path, base_filename)
                 dest_media_path = os.path.join(output_media_path, base_filename)
+
+                if media_index is not None:
+                    hash_value = media_index.get_hash(src_media_path)
+                    if hash_value is not None:
+                        if selected_hashes.search(hash_value, args.max_hash_distance):
+                            skipped_duplicates += 1
+                            continue
+                        selected_hashes.add(hash_value, src_media_path)
                 
                 if os.path.exists(src_media_path):
                     if args.action == "copy":
@@ -57,4 +73,6 @@ async def run_selector(args):
 
     print(f"Selected {len(selected_tweets)} tweets.")
     print(f"Selected tweets saved to {output_jsonl_path}")
+    if skipped_duplicates:
+        print(f"Skipped {skipped_duplicates} near-duplicate media files.")
     print(f"Media files saved to {output_media_path}")
@@ -0,0 +1,218 @@
+import os
+import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from choices import TREND_SORT_KEYS
+from config import config
+from records import read_tweets, run_scraped_at
+
+STAT_NAMES = ("reply", "repost", "like", "bookmark", "view")
+DAY_SECONDS = 24 * 60 * 60
+
+def _parse_timestamp(value: Optional[str]) -> int:
+    """Parses a tweet's ISO timestamp into epoch seconds, or 0 if missing/invalid."""
+    if not value:
+        return 0
+    try:
+        return int(datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return 0
+
+def _delta_encode(values: np.ndarray, starts: np.ndarray, base) -> np.ndarray:
+    """Encodes each segment as its first value minus base, then successive differences."""
+    deltas = values.copy()
+    deltas[1:] -= values[:-1]
+    deltas[starts] = values[starts] - base
+    return deltas
+
+def _delta_decode(deltas: np.ndarray, starts: np.ndarray, lengths: np.ndarray, base) -> np.ndarray:
+    """Inverts _delta_encode() with one cumulative sum instead of a per-segment loop."""
+    if len(deltas) == 0:
+        return deltas.astype(np.int64)
+    totals = np.cumsum(deltas.astype(np.int64), axis=0)
+    carried = totals[starts] - deltas[starts]
+    return totals - np.repeat(carried, lengths, axis=0) + base
+
+class StatsStore:
+    """
+    An append-only time series of tweet stat snapshots.
+
+    Snapshots are grouped per tweet in CSR layout: tweet_ids[i]'s snapshots live
+    at rows offsets[i]:offsets[i + 1] of times/values, sorted by time. On disk the
+    times and stat columns are delta-encoded within each tweet and compressed,
+    so a re-scrape with little change costs a few bytes per snapshot.
+    """
+    def __init__(self, store_file: str = config.STATS_STORE_FILE):
+        self.store_file = store_file
+        self.tweet_ids = np.zeros(0, dtype=np.int64)
+        self.posted_at = np.zeros(0, dtype=np.int64)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.times = np.zeros(0, dtype=np.int64)
+        self.values = np.zeros((0, len(STAT_NAMES)), dtype=np.int64)
+        if os.path.exists(store_file):
+            self._load()
+
+    @property
+    def snapshot_count(self) -> int:
+        return len(self.times)
+
+    def _segments(self):
+        starts = self.offsets[:-1]
+        return starts, np.diff(self.offsets)
+
+    def _load(self):
+        with np.load(self.store_file) as data:
+            self.tweet_ids = data["tweet_ids"]
+            self.posted_at = data["posted_at"]
+            self.offsets = data["offsets"]
+            base_time = int(data["base_time"])
+            starts, lengths = self._segments()
+            self.times = _delta_decode(data["time_deltas"], starts, lengths, base_time)
+            self.values = _delta_decode(data["value_deltas"], starts, lengths, 0)
+
+    def save(self):
+        store_dir = os.path.dirname(self.store_file)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+        starts, _ = self._segments()
+        base_time = int(self.times.min()) if len(self.times) else 0
+        tmp_path = f"{self.store_file}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            tweet_ids=self.tweet_ids,
+            posted_at=self.posted_at,
+            offsets=self.offsets,
+            base_time=np.int64(base_time),
+            time_deltas=_delta_encode(self.times, starts, base_time).astype(np.uint32),
+            value_deltas=_delta_encode(self.values, starts, 0).astype(np.int32),
+        )
+        os.replace(tmp_path, self.store_file)
+
+    def add_snapshots(self, tweets: List[dict], observed_at: int) -> int:
+        """
+        Records the stats of each tweet as observed at epoch second observed_at.
+
+        A snapshot of the same tweet at the same second replaces the earlier one,
+        so re-ingesting a run is harmless.
+
+        Returns:
+            The number of snapshots added.
+        """
+        new_ids, new_posted, new_values = [], [], []
+        for tweet in tweets:
+            tweet_id = tweet.get("id")
+            if not tweet_id or not str(tweet_id).isdigit():
+                continue
+            stats = tweet.get("stats", {})
+            new_ids.append(int(tweet_id))
+            new_posted.append(_parse_timestamp(tweet.get("timestamp")))
+            new_values.append([stats.get(stat, 0) for stat in STAT_NAMES])
+        if not new_ids:
+            return 0
+
+        starts, lengths = self._segments()
+        snap_ids = np.concatenate([np.repeat(self.tweet_ids, lengths), np.array(new_ids, dtype=np.int64)])
+        snap_posted = np.concatenate([np.repeat(self.posted_at, lengths), np.array(new_posted, dtype=np.int64)])
+        snap_times = np.concatenate([self.times, np.full(len(new_ids), observed_at, dtype=np.int64)])
+        snap_values = np.concatenate([self.values, np.array(new_values, dtype=np.int64).reshape(-1, len(STAT_NAMES))])
+
+        # Stable sort by (tweet, time); for duplicate keys keep the last row added.
+        order = np.lexsort((snap_times, snap_ids))
+        snap_ids, snap_posted = snap_ids[order], snap_posted[order]
+        snap_times, snap_values = snap_times[order], snap_values[order]
+        keep = np.ones(len(order), dtype=bool)
+        keep[:-1] = (snap_ids[:-1] != snap_ids[1:]) | (snap_times[:-1] != snap_times[1:])
+        snap_ids, snap_posted = snap_ids[keep], snap_posted[keep]
+        snap_times, snap_values = snap_times[keep], snap_values[keep]
+
+        self.tweet_ids, first_rows = np.unique(snap_ids, return_index=True)
+        self.offsets = np.append(first_rows, len(snap_ids)).astype(np.int64)
+        self.posted_at = np.maximum.reduceat(snap_posted, first_rows) if len(first_rows) else snap_posted
+        self.times, self.values = snap_times, snap_values
+        return len(new_ids)
+
+    def _stat_column(self, stat: str) -> np.ndarray:
+        return self.values[:, STAT_NAMES.index(stat)]
+
+    def latest(self, stat: str) -> np.ndarray:
+        """Returns the most recent value of stat for every tweet, aligned with tweet_ids."""
+        return self._stat_column(stat)[self.offsets[1:] - 1]
+
+    def gained(self, stat: str, window_seconds: int = DAY_SECONDS, now: Optional[int] = None) -> np.ndarray:
+        """
+        Returns how much stat grew per tweet over the window ending at now.
+
+        The baseline is the last snapshot at or before the window start. Tweets
+        posted inside the window count from zero; older tweets first seen inside
+        the window count from their first snapshot.
+        """
+        now = int(now if now is not None else datetime.datetime.now().timestamp())
+        cutoff = now - window_seconds
+        column = self._stat_column(stat)
+        starts, lengths = self._segments()
+
+        # Find the last snapshot <= cutoff in each tweet's segment with a single
+        # searchsorted over (tweet index, time) packed into one sorted int64 key.
+        tweet_index = np.arange(len(self.tweet_ids), dtype=np.int64)
+        time_base = int(self.times.min()) if len(self.times) else 0
+        keys = (np.repeat(tweet_index, lengths) << 32) + (self.times - time_base)
+        probe = (tweet_index << 32) + np.clip(cutoff - time_base, -1, (1 << 32) - 1)
+        before = np.searchsorted(keys, probe, side="right") - 1
+        has_before = before >= starts
+
+        baseline = np.where(has_before, column[np.maximum(before, 0)], column[starts])
+        posted_in_window = (self.posted_at >= cutoff) & ~has_before
+        baseline = np.where(posted_in_window, 0, baseline)
+        return self.latest(stat) - baseline
+
+    def growth_rate(self, stat: str) -> np.ndarray:
+        """
+        Returns stat growth per hour for every tweet.
+
+        Uses the first and last snapshot when a tweet has several; otherwise the
+        single snapshot is measured against the tweet's post time.
+        """
+        column = self._stat_column(stat)
+        starts, lengths = self._segments()
+        ends = self.offsets[1:] - 1
+
+        first_value = np.where(lengths > 1, column[starts], 0)
+        first_time = np.where(lengths > 1, self.times[starts], self.posted_at)
+        elapsed_hours = (self.times[ends] - first_time) / 3600.0
+        valid = (first_time > 0) & (elapsed_hours > 0)
+        rates = np.zeros(len(self.tweet_ids), dtype=np.float64)
+        np.divide(column[ends] - first_value, elapsed_hours, out=rates, where=valid)
+        return rates
+
+    def metric_by_id(self, sort_key: str) -> Dict[str, float]:
+        """Evaluates one of TREND_SORT_KEYS for every tweet, keyed by tweet ID string."""
+        stat, kind = TREND_SORT_KEYS[sort_key]
+        metric = self.gained(stat) if kind == "gained" else self.growth_rate(stat)
+        return dict(zip(map(str, self.tweet_ids.tolist()), metric.tolist()))
+
+def record_run(tweets: List[dict], jsonl_path: str, store_file: str = config.STATS_STORE_FILE):
+    """Adds a freshly written run's stats to the store, stamped with the run's scrape time."""
+    store = StatsStore(store_file)
+    store.add_snapshots(tweets, int(run_scraped_at(jsonl_path)))
+    store.save()
+
+def run_stats_ingest(args):
+    """Backfills the stats store from every tweets.jsonl under a data root."""
+    if not os.path.isdir(args.data_root):
+        print(f"Error: {args.data_root} not found.")
+        return
+
+    store = StatsStore(args.store_file)
+    before = store.snapshot_count
+    for dir_name in sorted(os.listdir(args.data_root)):
+        jsonl_path = os.path.join(args.data_root, dir_name, "tweets.jsonl")
+        if not os.path.isfile(jsonl_path):
+            continue
+        store.add_snapshots(read_tweets(jsonl_path), int(run_scraped_at(jsonl_path)))
+
+    store.save()
+    size = os.path.getsize(args.store_file)
+    print(f"Stats store holds {store.snapshot_count} snapshots of {len(store.tweet_ids)} tweets "
+          f"({store.snapshot_count - before} new, {size / max(store.snapshot_count, 1):.1f} bytes/snapshot).")
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import main
+from job_queue import SQLiteJobQueue
+
+ARTISTS = ["alice", "bob", "carol"]
+
+async def _scrape_in_full(scraper, username, args, limit):
+    """Stands in for main.scrape_artist: every artist has more tweets than any limit."""
+    return limit, f"runs/{username}"
+
+class SeedRoundTest(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, "queue.sqlite3")
+        self.queue = SQLiteJobQueue(self.path, "user_scrape")
+        self.args = SimpleNamespace(max_tweets=100, max_artist_tweets=None, lease_seconds=60)
+
+    def _run_day(self):
+        main.seed_artist_queue(self.queue, ARTISTS, self.args)
+        with mock.patch.object(main, "scrape_artist", _scrape_in_full):
+            asyncio.run(main.scrape_artists_from_queue(None, self.queue, self.args))
+        return self.queue.status()
+
+    def test_daily_seed_restarts_a_round_stopped_by_the_budget(self):
+        states, counters = self._run_day()
+        self.assertEqual((states["done"], states["pending"], counters["tweets"]), (1, 2, 100))
+        [(first_day, _, _)] = self.queue.results()
+
+        states, counters = self._run_day()
+        self.assertEqual((states["done"], states["pending"], counters["tweets"]), (1, 2, 100))
+        [(second_day, _, _)] = self.queue.results()
+        self.assertNotEqual(first_day, second_day)
+
+    def test_seed_keeps_the_budget_while_jobs_are_leased(self):
+        main.seed_artist_queue(self.queue, ARTISTS, self.args)
+        lease = self.queue.lease("worker")
+        self.queue.reserve("tweets", 100, 100)
+
+        self.assertEqual(main.seed_artist_queue(self.queue, ARTISTS + ["dave"], self.args), 1)
+        _, counters = self.queue.status()
+        self.assertEqual(counters["tweets"], 100)
+
+        self.queue.complete(lease, {"tweets": 100})
+        self.assertEqual(main.seed_artist_queue(self.queue, ARTISTS, self.args), 1)
+        states, counters = self.queue.status()
+        self.assertEqual((states["pending"], counters), (4, {}))
+
+    def test_seeding_an_unfinished_round_only_adds_new_keys(self):
+        main.seed_artist_queue(self.queue, ARTISTS, self.args)
+        self.queue.complete(self.queue.lease("worker"), {"tweets": 10})
+        self.queue.add_to_counter("tweets", 10)
+
+        self.assertEqual(main.seed_artist_queue(self.queue, ARTISTS, self.args), 0)
+        states, counters = self.queue.status()
+        self.assertEqual((states["done"], counters["tweets"]), (1, 10))
+
+if __name__ == "__main__":
+    unittest.main()